@@ -0,0 +1,100 @@
+"""BM25: rank_bm25 BM25Retriever (dill) vs the sparse inverted index, as the chunk count grows.
+
+For each corpus size, builds both engines over the same synthetic chunks
+(Zipf-distributed vocabulary, so common terms appear in most chunks and rare
+ones in few) and saves them the way the backend does. Then reports build
+time, load time (dill.load vs load_npz + mapped chunks), mean query latency
+and on-disk size, and checks that both return chunks with the same BM25
+scores for every query.
+
+From backend/:
+    python -m bench.bm25
+    python -m bench.bm25 --sizes 10000 50000 200000 --queries 200
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import dill
+import numpy as np
+from langchain_community.retrievers import BM25Retriever
+from langchain_core.documents import Document
+
+from scripts.sparse_bm25 import SparseBM25
+
+
+def make_corpus(rng: np.random.Generator, chunks: int, vocab: int = 50000, words: int = 170) -> list[Document]:
+    terms = np.array([f"t{i}" for i in range(vocab)])
+    ids = np.minimum(rng.zipf(1.2, (chunks, words)), vocab) - 1
+    return [Document(page_content=" ".join(terms[row]), metadata={"chunk_number": i}) for i, row in enumerate(ids)]
+
+
+def make_queries(rng: np.random.Generator, docs: list[Document], n: int) -> list[str]:
+    """A few words lifted from random chunks, like a keyword query"""
+    queries = []
+    for doc in rng.choice(len(docs), n):
+        words = docs[doc].page_content.split()
+        start = rng.integers(0, len(words) - 4)
+        queries.append(" ".join(words[start:start + rng.integers(2, 5)]))
+    return queries
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 50000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'chunks':>8}  {'engine':<14} {'build s':>8} {'load s':>8} {'query ms':>9} {'disk MB':>8}")
+    for size in args.sizes:
+        docs = make_corpus(rng, size)
+        queries = make_queries(rng, docs, args.queries)
+        workdir = Path(tempfile.mkdtemp(prefix="bench_bm25_"))
+        try:
+            legacy, legacy_build = timed(BM25Retriever.from_documents, docs)
+            with open(workdir / "bm25.dill", "wb") as f:
+                dill.dump(legacy, f)
+            sparse, sparse_build = timed(SparseBM25.from_documents, docs)
+            sparse.save(workdir / "bm25")
+            del legacy, sparse
+
+            legacy, legacy_load = timed(lambda: dill.load(open(workdir / "bm25.dill", "rb")))
+            sparse, sparse_load = timed(SparseBM25.load, workdir / "bm25")
+
+            results = {}
+            for name, engine in (("BM25Retriever", legacy), ("SparseBM25", sparse)):
+                start = time.perf_counter()
+                results[name] = [engine.invoke(query) for query in queries]
+                results[name + " ms"] = (time.perf_counter() - start) / len(queries) * 1000
+
+            # Ties may come back in a different order, so compare the scores of what was returned
+            for query, old, new in zip(queries, results["BM25Retriever"], results["SparseBM25"]):
+                old_scores = legacy.vectorizer.get_batch_scores(query.split(), [d.metadata["chunk_number"] for d in old])
+                new_scores = legacy.vectorizer.get_batch_scores(query.split(), [d.metadata["chunk_number"] for d in new])
+                # rank_bm25 pads with unrelated zero-score chunks when fewer than k match; the sparse index doesn't
+                if not np.allclose(sorted(s for s in old_scores if s > 0), sorted(new_scores), rtol=1e-4):
+                    raise SystemExit(f"Rankings differ for {query!r}: {old_scores} vs {new_scores}")
+
+            disk = {
+                "BM25Retriever": (workdir / "bm25.dill").stat().st_size,
+                "SparseBM25": sum(p.stat().st_size for p in workdir.glob("bm25.*") if p.suffix != ".dill"),
+            }
+            for name, build, load in (("BM25Retriever", legacy_build, legacy_load), ("SparseBM25", sparse_build, sparse_load)):
+                print(f"{size:>8}  {name:<14} {build:>8.2f} {load:>8.3f} {results[name + ' ms']:>9.2f} {disk[name] / (1 << 20):>8.1f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    print("\nRankings match: every query returned chunks with the same BM25 scores from both engines.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Build reports: compare two index builds stage by stage to spot regressions.
+
+Every build_index.py run writes indexes/reports{tag}/<version>.json with the
+wall time, counts, throughput and peak RSS of each stage (parse, chunk,
+embed, dedup, bm25, faiss), the slowest and failed files and the size of
+what it wrote. This compares two of them: the newest against the one
+before by default. It prints each stage's time, rate and peak RSS side by
+side with the change, any setting that differs (chunk size, model, index
+type, corpus size), artifact sizes and the slowest files of the newer
+build. Stages that got slower (by more than --threshold and --min-seconds)
+or used more memory (by more than --threshold) are flagged; with --fail the
+exit status is 1 if any were.
+
+From backend/ (needs two builds):
+    python -m bench.build_report
+    python -m bench.build_report --tag _test
+    python -m bench.build_report 20250101-020000 20250108-020000 --threshold 0.2 --fail
+    python -m bench.build_report --list
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from scripts.build_report import load_report, report_dir
+
+
+def resolve(name: str, tag: str) -> Path:
+    """A report path, or a version name in the tag's report directory"""
+    path = Path(name)
+    return path if path.suffix == ".json" else report_dir(tag) / f"{name}.json"
+
+
+def change(old: float | None, new: float | None) -> str:
+    if not old or new is None:
+        return "-"
+    return f"{(new - old) / old:+.0%}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("reports", nargs="*", help="Baseline and candidate: versions or report paths (default: the two newest).")
+    ap.add_argument("--tag", default="", help="Index tag whose reports to use (default: prod).")
+    ap.add_argument("--threshold", type=float, default=0.10, help="Slowdown or memory growth flagged as a regression.")
+    ap.add_argument("--min-seconds", type=float, default=1.0, help="Ignore slowdowns smaller than this, which are noise.")
+    ap.add_argument("--fail", action="store_true", help="Exit with status 1 if any stage regressed.")
+    ap.add_argument("--list", action="store_true", help="List the saved reports and exit.")
+    args = ap.parse_args()
+
+    saved = sorted(report_dir(args.tag).glob("*.json"))
+    if args.list:
+        for path in saved:
+            report = load_report(path)
+            print(f"{path.stem}  {report['total_seconds']:>8.1f}s  peak {report['peak_rss_mb']:>8.0f} MB  "
+                  f"{report['settings'].get('chunks', '?')} chunks  {len(report['failed_files'])} failed")
+        return
+    if len(args.reports) == 1:
+        raise SystemExit("Pass two reports, or none to compare the two newest")
+    if not args.reports and len(saved) < 2:
+        raise SystemExit(f"Need two reports in {report_dir(args.tag)}; found {len(saved)}")
+    paths = [resolve(name, args.tag) for name in args.reports] or saved[-2:]
+    old, new = (load_report(path) for path in paths)
+    print(f"baseline  {old['version']}  ({old['host']['machine']}, {old['host']['cpus']} CPUs)")
+    print(f"candidate {new['version']}  ({new['host']['machine']}, {new['host']['cpus']} CPUs)\n")
+
+    changed = {key for key in old["settings"].keys() | new["settings"].keys() if old["settings"].get(key) != new["settings"].get(key)}
+    for key in sorted(changed):
+        print(f"setting {key}: {old['settings'].get(key)} -> {new['settings'].get(key)}")
+    if old["host"] != new["host"]:
+        print("[WARN] Built on different hosts; timings are not directly comparable")
+    if changed or old["host"] != new["host"]:
+        print()
+
+    regressions = []
+    print(f"{'stage':<8} {'old s':>8} {'new s':>8} {'change':>7}  {'rate':<16} {'old/s':>9} {'new/s':>9}  {'old MB':>8} {'new MB':>8} {'change':>7}")
+    for stage in dict.fromkeys([*old["stages"], *new["stages"]]):
+        a, b = old["stages"].get(stage, {}), new["stages"].get(stage, {})
+        rate = next((key for key in b if key.endswith("_per_s")), next((key for key in a if key.endswith("_per_s")), ""))
+        flags = []
+        slowdown = b.get("seconds", 0) - a.get("seconds", 0)
+        if a.get("seconds") and slowdown > a["seconds"] * args.threshold and slowdown > args.min_seconds:
+            flags.append("slower")
+        if a.get("peak_rss_mb") and b.get("peak_rss_mb", 0) > a["peak_rss_mb"] * (1 + args.threshold):
+            flags.append("memory")
+        if flags:
+            regressions.append((stage, flags))
+        print(f"{stage:<8} {a.get('seconds', 0):>8.1f} {b.get('seconds', 0):>8.1f} {change(a.get('seconds'), b.get('seconds')):>7}  "
+              f"{rate.removesuffix('_per_s'):<16} {a.get(rate, 0):>9.1f} {b.get(rate, 0):>9.1f}  "
+              f"{a.get('peak_rss_mb', 0):>8.0f} {b.get('peak_rss_mb', 0):>8.0f} {change(a.get('peak_rss_mb'), b.get('peak_rss_mb')):>7}"
+              + (f"  <- {', '.join(flags)}" if flags else ""))
+    print(f"{'total':<8} {old['total_seconds']:>8.1f} {new['total_seconds']:>8.1f} {change(old['total_seconds'], new['total_seconds']):>7}  "
+          f"{'':<16} {'':>9} {'':>9}  {old['peak_rss_mb']:>8.0f} {new['peak_rss_mb']:>8.0f} {change(old['peak_rss_mb'], new['peak_rss_mb']):>7}")
+
+    old_bytes, new_bytes = old["artifacts"]["index_bytes"], new["artifacts"]["index_bytes"]
+    print(f"\nindex on disk: {old_bytes / 1e6:.1f} MB -> {new_bytes / 1e6:.1f} MB ({change(old_bytes, new_bytes)})")
+    for name in sorted(old["artifacts"]["cache_bytes"].keys() | new["artifacts"]["cache_bytes"].keys()):
+        a, b = old["artifacts"]["cache_bytes"].get(name, 0), new["artifacts"]["cache_bytes"].get(name, 0)
+        print(f"  cache/{name}: {a / 1e6:.1f} MB -> {b / 1e6:.1f} MB")
+    print(f"failed files: {len(old['failed_files'])} -> {len(new['failed_files'])}")
+    for entry in new["slowest_files"][:5]:
+        print(f"  slowest: {entry['seconds']:>7.1f}s  {entry['pages'] or '-':>5} pages  {entry['file']}")
+
+    if regressions:
+        print(f"\nRegressions over {args.threshold:.0%}: " + "; ".join(f"{stage} ({', '.join(flags)})" for stage, flags in regressions))
+        if args.fail:
+            sys.exit(1)
+    else:
+        print(f"\nNo stage regressed by more than {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Chunking throughput: one task per document vs batched, initialized workers.
+
+Builds a synthetic corpus of many small documents and a few large ones and
+chunks it two ways: the old scheme, which submits the bound
+clean_paragraphs (pickling the whole DocumentChunker) once per document,
+and DocumentChunker._chunk_documents, whose workers hold the splitter and
+receive size-balanced batches. Chunks are compared so a speedup can't come
+from dropped text.
+
+From backend/:
+    python -m bench.chunking
+    python -m bench.chunking --docs 5000 --big 4 --workers 8
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from scripts.chunk_documents import DocumentChunker
+
+_WORDS = ("pump valve pressure gasket torque flange seal inspection operator maintenance bearing "
+          "shaft coupling alignment lubrication clearance procedure isolate lockout verify record").split()
+
+
+def make_text(rng: random.Random, paragraphs: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 160))) + "."
+        for _ in range(paragraphs)
+    )
+
+
+def make_chunker(workdir: Path) -> DocumentChunker:
+    # DocumentChunker's loader reads config.yaml from the working directory, as it does in the app
+    (workdir / "config.yaml").write_text("IGNORE_FOLDERS: []\nIGNORE_KEYWORDS: []\n")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return DocumentChunker()
+    finally:
+        os.chdir(cwd)
+
+
+def run_per_document(chunker: DocumentChunker, docs, chunk_size: int, chunk_overlap: int, workers: int):
+    """The previous scheme: one future per document, each pickling the bound method"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(chunker.clean_paragraphs, [text], chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                            min_length=chunk_size // 10, source=source)
+            for text, source in docs
+        ]
+        results = {}
+        for future in futures:
+            chunks = future.result()
+            if chunks:
+                results[chunks[0].metadata["source"]] = chunks
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--docs", type=int, default=3000, help="Small documents (1-6 paragraphs).")
+    ap.add_argument("--big", type=int, default=4, help="Large documents (2000 paragraphs).")
+    ap.add_argument("--chunk-size", type=int, default=1024)
+    ap.add_argument("--chunk-overlap", type=int, default=100)
+    ap.add_argument("--workers", type=int, default=DocumentChunker.CHUNK_WORKERS)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = [(make_text(rng, rng.randint(1, 6)), f"/docs/small{i}.txt") for i in range(args.docs)]
+    docs += [(make_text(rng, 2000), f"/docs/big{i}.pdf") for i in range(args.big)]
+    rng.shuffle(docs)
+    chars = sum(len(text) for text, _ in docs)
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_chunking_"))
+    try:
+        chunker = make_chunker(workdir)
+        chunker.CHUNK_WORKERS = args.workers
+
+        t0 = time.perf_counter()
+        old = run_per_document(chunker, docs, args.chunk_size, args.chunk_overlap, args.workers)
+        old_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new = chunker._chunk_documents(iter(docs), len(docs), args.chunk_size, args.chunk_overlap)
+        new_time = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def flatten(chunks_by_source):
+        return {(s, d.metadata["chunk_number"], d.page_content) for s, chunks in chunks_by_source.items() for d in chunks}
+    if flatten(old) != flatten(new):
+        raise SystemExit("Chunk output differs between the two schemes")
+
+    n_chunks = sum(len(c) for c in new.values())
+    print(f"\n{len(docs)} documents, {chars / 1e6:.1f}M chars -> {n_chunks} chunks, {args.workers} workers")
+    print(f"  per-document tasks  {old_time:6.2f}s  {len(docs) / old_time:8.0f} docs/s  {chars / old_time / 1e6:6.2f} Mchar/s")
+    print(f"  batched workers     {new_time:6.2f}s  {len(docs) / new_time:8.0f} docs/s  {chars / new_time / 1e6:6.2f} Mchar/s  ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
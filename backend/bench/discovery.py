@@ -0,0 +1,113 @@
+"""File discovery rate: serial os.walk vs the concurrent scandir walker.
+
+Builds a synthetic folder tree (including an IGNORE_FOLDERS entry and
+IGNORE_KEYWORDS hits), walks it with DocumentLoader.gather_supported_files
+and DocumentLoader.iter_supported_files, checks both find the same files and
+reports files/sec. Local disks list directories in microseconds, so
+--latency adds a per-directory delay to os.scandir to model a network share.
+
+From backend/:
+    python -m bench.discovery
+    python -m bench.discovery --dirs 400 --files 20 --latency 20
+    python -m bench.discovery --root //server/share/docs   # walk a real folder
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from scripts.load_utils import DocumentLoader
+
+IGNORED_FOLDER = "archive"
+IGNORED_KEYWORD = "~$"
+
+
+def make_tree(root: Path, dirs: int, files: int, rng: random.Random):
+    """Random tree of dirs folders with files each, plus ignored folders and temp files"""
+    folders = [root]
+    for i in range(dirs):
+        folder = rng.choice(folders) / f"dir{i}"
+        folder.mkdir()
+        folders.append(folder)
+    for folder in folders:
+        for j in range(files):
+            (folder / f"doc{j}.txt").write_text("x")
+        (folder / f"{IGNORED_KEYWORD}doc.docx").write_text("x")
+    ignored = root / IGNORED_FOLDER
+    ignored.mkdir()
+    for j in range(files):
+        (ignored / f"doc{j}.txt").write_text("x")
+
+
+def make_loader(workdir: Path, root: Path) -> DocumentLoader:
+    # DocumentLoader reads config.yaml from the working directory, as it does in the app
+    (workdir / "config.yaml").write_text(
+        f"IGNORE_FOLDERS: ['{(root / IGNORED_FOLDER).as_posix()}']\nIGNORE_KEYWORDS: ['{IGNORED_KEYWORD}']\n"
+    )
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return DocumentLoader()
+    finally:
+        os.chdir(cwd)
+
+
+def add_latency(ms: float):
+    """Delays every directory listing; os.walk and the concurrent walker both go through os.scandir"""
+    scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(ms / 1000)
+        return scandir(path)
+
+    os.scandir = slow_scandir
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dirs", type=int, default=200, help="Folders in the synthetic tree.")
+    ap.add_argument("--files", type=int, default=10, help="Files per folder.")
+    ap.add_argument("--latency", type=float, default=5.0, help="Simulated ms per directory listing (0 for none).")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--root", help="Walk this folder instead of a synthetic tree (no ignore rules).")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_discovery_"))
+    try:
+        if args.root:
+            root = Path(args.root)
+        else:
+            root = workdir / "docs"
+            root.mkdir()
+            make_tree(root, args.dirs, args.files, random.Random(args.seed))
+        loader = make_loader(workdir, root)
+        if args.latency:
+            add_latency(args.latency)
+
+        serial, serial_time = timed(lambda: loader.gather_supported_files(str(root)))
+        concurrent, concurrent_time = timed(lambda: list(loader.iter_supported_files([str(root)], max_workers=args.workers)))
+
+        if set(serial) != set(concurrent):
+            raise SystemExit(f"Walkers disagree: {len(set(serial) - set(concurrent))} missed, {len(set(concurrent) - set(serial))} extra")
+        if not args.root and any(IGNORED_FOLDER in p.parts or IGNORED_KEYWORD in p.name for p in concurrent):
+            raise SystemExit("Ignore rules were not applied")
+
+        print(f"\n{len(serial)} files, {args.latency:g} ms per listing")
+        print(f"  os.walk            {serial_time:7.2f}s  {len(serial) / serial_time:9.0f} files/s")
+        print(f"  concurrent scandir {concurrent_time:7.2f}s  {len(concurrent) / concurrent_time:9.0f} files/s  ({serial_time / concurrent_time:.1f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
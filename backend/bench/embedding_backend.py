@@ -0,0 +1,108 @@
+"""Embedding backends: recall parity on the eval set and latency, torch vs ONNX int8.
+
+Takes the chunks of a built index (cache/chunked_docs{tag}.json): every chunk
+of the documents eval/dataset.jsonl expects, plus a random sample of the rest
+as distractors. Each backend embeds that corpus and every eval question, and
+dense-only retrieval (cosine top-k, what the FAISS side of the hybrid
+retriever ranks by) is scored by the eval's hit-rate rule. Reports hit-rate,
+how much each backend's top-k agrees with the first one's, the cosine between
+their chunk vectors, query latency and chunks/sec. Exits non-zero when a
+backend's hit-rate falls more than --tolerance below the first backend's.
+
+From backend/ (needs a built index; onnx-int8 needs optimum-onnx and onnxruntime, pinned in requirements):
+    python -m bench.embedding_backend
+    python -m bench.embedding_backend --index-tag _test --distractors 0 --k 10
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import numpy as np
+
+from eval.run import load_dataset
+from scripts.embed_engine import CpuEmbedder
+from scripts.embedding_backend import BACKENDS, load_embeddings, sentence_transformer_args
+from scripts.load_utils import CACHE_DIR
+
+
+def load_corpus(tag: str, items: list[dict], distractors: int, seed: int) -> tuple[list[str], list[str]]:
+    """(texts, sources): chunks of the expected documents plus sampled distractors; distractors=0 keeps every chunk"""
+    with open(CACHE_DIR / f"chunked_docs{tag}.json", "r", encoding="utf-8") as f:
+        chunks = [(d["page_content"], source) for source, docs in json.load(f).items() for d in docs]
+    wanted = {it["expected_source"].lower() for it in items}
+    relevant = [c for c in chunks if any(w in c[1].lower() for w in wanted)]
+    others = [c for c in chunks if not any(w in c[1].lower() for w in wanted)]
+    if distractors:
+        others = random.Random(seed).sample(others, min(distractors, len(others)))
+    corpus = list(dict.fromkeys(relevant + others))
+    return [text for text, _ in corpus], [source for _, source in corpus]
+
+
+def run_backend(backend: str, texts: list[str], questions: list[str]) -> dict:
+    embeddings = load_embeddings(backend, "cpu")
+    model_name, model_kwargs = sentence_transformer_args(backend, "cpu")
+    vectors = {}
+    rate = CpuEmbedder(model_name, 1, 0, model_kwargs).encode(
+        texts, lambda batch, batch_vectors: vectors.update(zip(batch, batch_vectors)), model=embeddings._client
+    )
+    embeddings.embed_query(questions[0])  # Warm up
+    latencies, queries = [], []
+    for question in questions:
+        start = time.perf_counter()
+        queries.append(embeddings.embed_query(question))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "docs": np.stack([vectors[text] for text in texts]).astype(np.float32),
+        "queries": np.array(queries, dtype=np.float32),
+        "latencies": sorted(latencies),
+        "rate": rate,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS, help="The first is the reference.")
+    ap.add_argument("--index-tag", default="", help="Index whose chunks to use (default: prod).")
+    ap.add_argument("--max-version", default=None, help="Eval questions added up to this version, e.g. v1.")
+    ap.add_argument("--distractors", type=int, default=2000, help="Chunks sampled from other documents; 0 uses all.")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--tolerance", type=float, default=0.02, help="Allowed hit-rate drop vs the reference backend.")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    items = load_dataset(args.max_version)
+    texts, sources = load_corpus(args.index_tag, items, args.distractors, args.seed)
+    questions = [it["question"] for it in items]
+    print(f"{len(items)} questions over {len(texts)} chunks, dense top-{args.k}")
+
+    results = {backend: run_backend(backend, texts, questions) for backend in args.backends}
+
+    reference = args.backends[0]
+    top = {}
+    failed = False
+    for backend, result in results.items():
+        scores = result["queries"] @ result["docs"].T
+        top[backend] = np.argsort(-scores, axis=1)[:, :args.k]
+        hits = sum(
+            any(it["expected_source"].lower() in sources[i].lower() for i in row)
+            for it, row in zip(items, top[backend])
+        )
+        result["hit_rate"] = hits / len(items)
+        line = (f"  {backend:<10} hit-rate {result['hit_rate']:6.1%}   query p50 {statistics.median(result['latencies']):6.1f} ms"
+                f"   p95 {result['latencies'][int(0.95 * (len(result['latencies']) - 1))]:6.1f} ms   docs {result['rate']:6.1f} chunks/s")
+        if backend != reference:
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top[reference], top[backend])])
+            cosine = np.mean(np.sum(result["docs"] * results[reference]["docs"], axis=1))
+            line += f"   top-{args.k} overlap {overlap:.1%}   chunk cosine {cosine:.4f}"
+            if result["hit_rate"] < results[reference]["hit_rate"] - args.tolerance:
+                failed = True
+        print(line)
+
+    if failed:
+        raise SystemExit(f"Hit-rate dropped more than {args.tolerance:.0%} below {reference}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""CPU embedding throughput: arrival-order batches of 32 vs length buckets and worker layouts.
+
+Builds synthetic chunks with the length mix of a real corpus (mostly full
+1024-char chunks, plus many short tails and headings) and encodes them with
+the real model: first the old way, one process in arrival order with
+batch_size=32, then with CpuEmbedder for each workers x threads layout given.
+Reports padding waste (padded characters / real characters, a proxy for
+wasted tokens) and chunks/sec, to size build machines. Multi-worker rates
+include each worker loading the model, since a build pays that too.
+
+From backend/ (needs sentence-transformers and the model):
+    python -m bench.embedding_engine
+    python -m bench.embedding_engine --chunks 5000 --layouts 1x8 2x4 4x2 8x1
+"""
+import argparse
+import os
+import random
+import time
+
+from scripts.embed_engine import CpuEmbedder
+
+_WORDS = ("pump valve pressure gasket torque flange seal inspection operator maintenance bearing "
+          "shaft coupling alignment lubrication clearance procedure isolate lockout verify record").split()
+
+
+def make_chunks(rng: random.Random, n: int) -> list[str]:
+    chunks = []
+    for _ in range(n):
+        r = rng.random()
+        length = 1024 if r < 0.6 else rng.randint(20, 200) if r < 0.85 else rng.randint(200, 1024)
+        text = ""
+        while len(text) < length:
+            text += rng.choice(_WORDS) + " "
+        chunks.append(text[:length])
+    return chunks
+
+
+def padding_waste(batches: list[list[str]]) -> float:
+    real = sum(len(text) for batch in batches for text in batch)
+    padded = sum(len(batch) * max(map(len, batch)) for batch in batches)
+    return padded / real - 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=2000)
+    ap.add_argument("--model", default="BAAI/bge-large-en-v1.5")
+    ap.add_argument("--layouts", nargs="*", default=None, help="workers x threads, e.g. 2x4. Default: auto plus 1 x all cores.")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    texts = make_chunks(random.Random(args.seed), args.chunks)
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    layouts = [tuple(map(int, layout.split("x"))) for layout in args.layouts] if args.layouts else [(0, 0), (1, cpus)]
+
+    arrival = [texts[i:i + 32] for i in range(0, len(texts), 32)]
+    print(f"{len(texts)} chunks, {sum(map(len, texts)) / len(texts):.0f} chars on average, {cpus} CPUs")
+    print(f"  padding waste   arrival order, 32/batch {padding_waste(arrival):6.1%}   "
+          f"length buckets {padding_waste(CpuEmbedder(args.model, 1, 1).buckets(texts)):6.1%}")
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(cpus)
+    model = SentenceTransformer(args.model, device="cpu")
+    model.encode(texts[:32], batch_size=32)  # Warm up
+    t0 = time.perf_counter()
+    for batch in arrival:
+        # One encode call per batch, as the old slices saw them: no sorting across the whole corpus
+        model.encode(batch, batch_size=32, show_progress_bar=False, normalize_embeddings=True)
+    baseline = len(texts) / (time.perf_counter() - t0)
+    print(f"  arrival order   1 x {cpus:<3}        {baseline:8.1f} chunks/s")
+
+    for workers, threads in layouts:
+        embedder = CpuEmbedder(args.model, workers, threads)
+        # A single worker reuses the loaded model, as build_faiss does
+        rate = embedder.encode(texts, lambda *_: None, model=model if embedder.workers == 1 else None)
+        print(f"  length buckets  {embedder.workers} x {embedder.threads:<3}        {rate:8.1f} chunks/s  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Embedding cache load time and peak RSS: dill-pickled lists vs mmap'd .npy store.
+
+Writes the same random vectors in both formats: the old faiss_embeddings
+cache (5000-row dill batches of (text, list-of-floats) pairs) and
+EmbeddingStore (a float32 or float16 .npy segment + sidecar ids). Each is loaded
+in a fresh process, which builds the float32 matrix FAISS is fed and reports
+wall time and peak RSS, so one run's allocations can't leak into the other.
+
+From backend/:
+    python -m bench.embedding_store
+    python -m bench.embedding_store --rows 200000 --dim 1024 --dtype float16
+
+Peak RSS comes from /proc (Linux) or resource.getrusage (macOS), so this doesn't run on Windows.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import dill
+import numpy as np
+
+from scripts.embedding_store import EmbeddingStore
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is per process image; ru_maxrss on Linux carries over the parent's peak across exec
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    # ru_maxrss is bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20)
+
+
+def write_caches(workdir: Path, rows: int, dim: int, dtype: str):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+    texts = [f"chunk {i} " + "x" * 200 for i in range(rows)]
+    with open(workdir / "faiss_embeddings.pkl", "wb") as f:
+        for i in range(0, rows, 5000):
+            dill.dump([(text, vector.tolist()) for text, vector in zip(texts[i:i + 5000], vectors[i:i + 5000])], f)
+    EmbeddingStore("bench-model", dtype=dtype, root=workdir / "embeddings").add(texts, vectors)
+
+
+def load_legacy(workdir: Path) -> np.ndarray:
+    """What build_faiss used to do: unpickle every batch into a text -> list map, then build the array for FAISS"""
+    known = {}
+    with open(workdir / "faiss_embeddings.pkl", "rb") as f:
+        while True:
+            try:
+                batch = dill.load(f)
+            except EOFError:
+                break
+            known.update(batch)
+    return np.array(list(known.values()), dtype=np.float32)
+
+
+def load_store(workdir: Path) -> np.ndarray:
+    store = EmbeddingStore("bench-model", root=workdir / "embeddings")
+    store.load()
+    return store.vectors(store.locate([f"chunk {i} " + "x" * 200 for i in range(len(store))]))
+
+
+def child(mode: str, workdir: Path):
+    start = time.perf_counter()
+    matrix = load_legacy(workdir) if mode == "legacy" else load_store(workdir)
+    checksum = float(matrix[:, 0].sum())  # Touch a column so a lazy mapping is actually read
+    print(f"{time.perf_counter() - start:.3f} {peak_rss_mb():.1f} {checksum:.3f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=1024, help="bge-large is 1024.")
+    ap.add_argument("--dtype", choices=("float32", "float16"), default="float32")
+    ap.add_argument("--child", choices=("legacy", "store"), help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, Path(args.workdir))
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_embeddings_"))
+    try:
+        print(f"Writing {args.rows} x {args.dim} vectors in both formats...")
+        write_caches(workdir, args.rows, args.dim, args.dtype)
+        sizes = {
+            "legacy": (workdir / "faiss_embeddings.pkl").stat().st_size,
+            "store": sum(p.stat().st_size for p in (workdir / "embeddings").rglob("*.npy")),
+        }
+        results = {}
+        for mode in ("legacy", "store"):
+            out = subprocess.run(
+                [sys.executable, "-m", "bench.embedding_store", "--child", mode, "--workdir", str(workdir)],
+                capture_output=True, text=True, check=True, env=os.environ,
+            ).stdout.split()
+            results[mode] = out
+
+        if abs(float(results["legacy"][2]) - float(results["store"][2])) > 1e-2 * args.rows:
+            raise SystemExit("Loaded vectors differ between formats")
+        print(f"\n{args.rows} x {args.dim}, store dtype {args.dtype}")
+        for mode, label in (("legacy", "dill lists"), ("store", "npy mmap")):
+            seconds, rss, _ = results[mode]
+            print(f"  {label:<11} load {float(seconds):7.2f}s   peak RSS {float(rss):7.0f} MB   on disk {sizes[mode] / (1 << 20):7.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""FAISS index types: recall@k vs query latency vs memory, to pick faiss_index / nprobe / efSearch.
+
+Takes the chunk vectors of a built index from the embedding store (so nothing
+is re-encoded) and builds each index_factory type over them. Queries are the
+eval/dataset.jsonl questions, embedded with the configured backend, or, with
+--queries sample, held-out chunk vectors (no model needed). For every type and
+every nprobe / efSearch value it reports recall@k against exact Flat search,
+the eval hit-rate (expected document in the top k, eval queries only), single
+query p50 latency, index size in memory and build time.
+
+From backend/ (needs a built index):
+    python -m bench.faiss_index
+    python -m bench.faiss_index --specs Flat HNSW32 "IVF{nlist},PQ64" --nprobe 8 32 --k 10
+    python -m bench.faiss_index --queries sample --sample 500
+"""
+import argparse
+import json
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from eval.run import load_dataset
+from scripts import config
+from scripts.embedding_backend import load_embeddings, model_id
+from scripts.embedding_store import EmbeddingStore
+from scripts.faiss_index import build_index, resolve_spec, tune_index
+from scripts.load_utils import CACHE_DIR
+
+SPECS = ["Flat", "HNSW32", "IVF{nlist},Flat", "IVF{nlist},SQ8", "IVF{nlist},PQ64"]
+
+
+def load_vectors(tag: str) -> tuple[np.ndarray, list[str]]:
+    """(vectors, sources) of every chunk of the index that has a stored embedding"""
+    with open(CACHE_DIR / f"chunked_docs{tag}.json", "r", encoding="utf-8") as f:
+        chunks = [(d["page_content"], source) for source, docs in json.load(f).items() for d in docs]
+    store = EmbeddingStore(model_id())
+    store.load()
+    present = [(text, source) for text, source in chunks if text in store]
+    if len(present) < len(chunks):
+        print(f"[WARN] {len(chunks) - len(present)} chunks have no stored embedding and are left out")
+    vectors = store.vectors(store.locate([text for text, _ in present]))
+    return np.ascontiguousarray(vectors, dtype=np.float32), [source for _, source in present]
+
+
+def load_queries(args) -> tuple[np.ndarray, list[str], np.ndarray, list[dict]]:
+    """
+    (vectors, sources, queries, eval items) for --queries eval (the eval questions,
+    embedded) or sample (held-out chunk vectors, which are then left out of vectors)
+    """
+    vectors, sources = load_vectors(args.index_tag)
+    if args.queries == "eval":
+        items = load_dataset(args.max_version)
+        embeddings = load_embeddings()
+        return vectors, sources, np.array([embeddings.embed_query(it["question"]) for it in items], dtype=np.float32), items
+    rng = np.random.default_rng(0)
+    held_out = rng.choice(len(vectors), min(args.sample, len(vectors) // 10), replace=False)
+    queries = vectors[held_out] + rng.normal(0, 0.01, (len(held_out), vectors.shape[1])).astype(np.float32)
+    keep = np.setdiff1d(np.arange(len(vectors)), held_out)
+    return vectors[keep], [sources[i] for i in keep], queries, []
+
+
+def sweep_values(index: faiss.Index, args) -> list[tuple[str, int | None]]:
+    """The query-time parameter this index type exposes, with the values to try"""
+    if faiss.try_extract_index_ivf(index) is not None:
+        return [("nprobe", value) for value in args.nprobe]
+    if "HNSW" in type(faiss.downcast_index(index)).__name__:
+        return [("efSearch", value) for value in args.ef_search]
+    return [("", None)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--specs", nargs="+", default=SPECS, help="faiss index_factory strings; {nlist} is sized to the corpus.")
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--index-tag", default="", help="Index whose chunks to use (default: prod).")
+    ap.add_argument("--queries", choices=("eval", "sample"), default="eval")
+    ap.add_argument("--sample", type=int, default=200, help="Held-out chunk vectors used as queries with --queries sample.")
+    ap.add_argument("--max-version", default=None, help="Eval questions added up to this version, e.g. v1.")
+    args = ap.parse_args()
+
+    vectors, sources, queries, items = load_queries(args)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]}, {len(queries)} {args.queries} queries, k={args.k}, "
+          f"configured {config.FAISS_INDEX} (nprobe {config.FAISS_NPROBE}, efSearch {config.FAISS_EF_SEARCH})\n")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{'index':<22} {'param':<14} {'recall@k':>8} {'hit-rate':>8} {'p50 ms':>8} {'MB':>9} {'build s':>8}")
+    for spec in args.specs:
+        t0 = time.perf_counter()
+        index = build_index(vectors, spec)
+        build_time = time.perf_counter() - t0
+        size_mb = len(faiss.serialize_index(index)) / 1e6
+        for name, value in sweep_values(index, args):
+            if value is not None:
+                tune_index(index, value if name == "nprobe" else config.FAISS_NPROBE, value if name == "efSearch" else config.FAISS_EF_SEARCH)
+            latencies = []
+            found = np.empty_like(truth)
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                found[i] = index.search(query[None, :], args.k)[1][0]
+                latencies.append((time.perf_counter() - start) * 1000)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(truth, found)])
+            hit_rate = "-"
+            if items:
+                hits = sum(any(it["expected_source"].lower() in sources[i].lower() for i in row if i >= 0) for it, row in zip(items, found))
+                hit_rate = f"{hits / len(items):.1%}"
+            param = f"{name}={value}" if name else "exact" if spec == "Flat" else ""
+            print(f"{resolve_spec(spec, len(vectors)):<22} {param:<14} {recall:>8.1%} {hit_rate:>8} "
+                  f"{statistics.median(latencies):>8.2f} {size_mb:>9.1f} {build_time:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
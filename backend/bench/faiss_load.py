@@ -0,0 +1,120 @@
+"""FAISS index startup: LangChain save_local/load_local vs native index + mmap'd chunk store.
+
+Writes the same random index and chunks both ways, then, in a fresh process
+each, loads the index and runs a few searches as the backend would. Reports
+load time and memory split into private (anonymous: copied into this process)
+and file-backed pages (page cache, shared by every process mapping the same
+index), so a second backend instance costs only the private part.
+
+From backend/:
+    python -m bench.faiss_load
+    python -m bench.faiss_load --chunks 200000 --dim 1024 --spec "IVF{nlist},Flat"
+
+Memory comes from /proc/self/status, so this runs on Linux only.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.faiss import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from scripts.chunk_store import ChunkStore
+from scripts.faiss_index import build_index, load_index, save_index
+
+
+class FixedEmbeddings(Embeddings):
+    """Stands in for the model: searches here go through vectors, not text"""
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def memory_mb() -> dict[str, float]:
+    fields = {}
+    for line in Path("/proc/self/status").read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name in ("RssAnon", "RssFile"):
+            fields[name] = int(value.split()[0]) / 1024
+    return fields
+
+
+def write_indexes(workdir: Path, chunks: int, dim: int, spec: str):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((chunks, dim), dtype=np.float32)
+    docs = [
+        Document(page_content=f"chunk {i} " + "procedure text " * 60, metadata={"source": f"/docs/doc{i // 40}.pdf", "chunk_number": i % 40})
+        for i in range(chunks)
+    ]
+    index = build_index(vectors, spec)
+    ids = [str(uuid.uuid4()) for _ in docs]
+    FAISS(FixedEmbeddings(), index, InMemoryDocstore(dict(zip(ids, docs))), dict(enumerate(ids))).save_local(str(workdir / "faiss.dill"))
+    ChunkStore.write(workdir / "faiss", docs)
+    save_index(index, str(workdir / "faiss.index"))
+
+
+def child(mode: str, workdir: Path, dim: int):
+    before = memory_mb()
+    start = time.perf_counter()
+    if mode == "langchain":
+        store = FAISS.load_local(str(workdir / "faiss.dill"), FixedEmbeddings(), allow_dangerous_deserialization=True)
+    else:
+        chunks = ChunkStore(workdir / "faiss")
+        store = FAISS(FixedEmbeddings(), load_index(str(workdir / "faiss.index")), chunks, chunks.row_ids())
+    loaded = time.perf_counter() - start
+    queries = np.random.default_rng(1).standard_normal((20, dim), dtype=np.float32)
+    start = time.perf_counter()
+    for query in queries:
+        store.similarity_search_by_vector(query.tolist(), k=6)
+    searched = (time.perf_counter() - start) / len(queries) * 1000
+    after = memory_mb()
+    print(f"{loaded:.4f} {searched:.2f} {after['RssAnon'] - before['RssAnon']:.1f} {after['RssFile'] - before['RssFile']:.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=50000)
+    ap.add_argument("--dim", type=int, default=1024, help="bge-large is 1024.")
+    ap.add_argument("--spec", default="Flat", help="faiss index_factory string.")
+    ap.add_argument("--child", choices=("langchain", "native"), help=argparse.SUPPRESS)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, Path(args.workdir), args.dim)
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_faiss_load_"))
+    try:
+        print(f"Writing {args.chunks} x {args.dim} {args.spec} index both ways...")
+        write_indexes(workdir, args.chunks, args.dim, args.spec)
+        sizes = {
+            "langchain": sum(p.stat().st_size for p in (workdir / "faiss.dill").iterdir()),
+            "native": sum(p.stat().st_size for p in workdir.glob("faiss.*") if p.is_file()),
+        }
+        print(f"\n{args.chunks} chunks x {args.dim}, {args.spec}")
+        for mode, label in (("langchain", "load_local"), ("native", "native mmap")):
+            out = subprocess.run(
+                [sys.executable, "-m", "bench.faiss_load", "--child", mode, "--workdir", str(workdir), "--dim", str(args.dim)],
+                capture_output=True, text=True, check=True, env=os.environ,
+            ).stdout.split()
+            loaded, searched, private, shared = map(float, out[-4:])
+            print(f"  {label:<12} load {loaded:8.3f}s   search {searched:6.2f} ms   private {private:7.0f} MB   "
+                  f"shared {shared:7.0f} MB   on disk {sizes[mode] / (1 << 20):7.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""FAISS vector precision: memory saved vs recall and eval hit-rate lost, to pick faiss_precision / faiss_pca_dim.
+
+Builds the configured index type (or --spec) over the chunk vectors of a built
+index, once per precision (float32, float16, int8 scalar quantization) and
+PCA dimension, as build_index.py would with those settings. Reports each
+one's bytes per chunk, index size and memory saved against the first row
+(float32 without PCA, by default). It also reports recall@k against exact
+float32 search, and eval hit-rate (expected document in the top k) with its
+change against that first row. Queries are the eval/dataset.jsonl questions
+or, with --queries sample, held-out chunk vectors (no model needed, no
+hit-rate).
+
+From backend/ (needs a built index):
+    python -m bench.faiss_precision
+    python -m bench.faiss_precision --spec HNSW32 --pca 0 512 256 --k 10
+    python -m bench.faiss_precision --queries sample
+"""
+import argparse
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from bench.faiss_index import load_queries
+from scripts import config
+from scripts.faiss_index import PRECISIONS, apply_precision, build_index, resolve_spec, tune_index
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--spec", default=config.FAISS_INDEX, help="faiss index_factory string to vary the precision of (default: configured).")
+    ap.add_argument("--precisions", nargs="+", choices=list(PRECISIONS), default=list(PRECISIONS))
+    ap.add_argument("--pca", type=int, nargs="+", default=[0, 512, 256], help="PCA output dimensions; 0 keeps all.")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--index-tag", default="", help="Index whose chunks to use (default: prod).")
+    ap.add_argument("--queries", choices=("eval", "sample"), default="eval")
+    ap.add_argument("--sample", type=int, default=200, help="Held-out chunk vectors used as queries with --queries sample.")
+    ap.add_argument("--max-version", default=None, help="Eval questions added up to this version, e.g. v1.")
+    args = ap.parse_args()
+
+    vectors, sources, queries, items = load_queries(args)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]}, {len(queries)} {args.queries} queries, k={args.k}, "
+          f"base {resolve_spec(args.spec, len(vectors))} (nprobe {config.FAISS_NPROBE}, efSearch {config.FAISS_EF_SEARCH})\n")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{'index':<30} {'B/chunk':>8} {'MB':>8} {'saved':>7} {'recall@k':>8} {'hit-rate':>8} {'change':>7} {'p50 ms':>7} {'build s':>7}")
+    baseline_mb = baseline_hits = None
+    for pca_dim in args.pca:
+        if pca_dim >= vectors.shape[1]:
+            continue
+        for precision in args.precisions:
+            spec = apply_precision(args.spec, precision, pca_dim)
+            t0 = time.perf_counter()
+            index = tune_index(build_index(vectors, spec), config.FAISS_NPROBE, config.FAISS_EF_SEARCH)
+            build_time = time.perf_counter() - t0
+            size_mb = len(faiss.serialize_index(index)) / 1e6
+
+            latencies = []
+            found = np.empty_like(truth)
+            for i, query in enumerate(queries):
+                start = time.perf_counter()
+                found[i] = index.search(query[None, :], args.k)[1][0]
+                latencies.append((time.perf_counter() - start) * 1000)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(truth, found)])
+
+            hit_rate = change = "-"
+            if items:
+                hits = sum(any(it["expected_source"].lower() in sources[i].lower() for i in row if i >= 0) for it, row in zip(items, found))
+                hit_rate = f"{hits / len(items):.1%}"
+                if baseline_hits is None:
+                    baseline_hits = hits
+                change = f"{(hits - baseline_hits) / len(items) * 100:+.1f}pp"
+            if baseline_mb is None:
+                baseline_mb = size_mb
+            print(f"{resolve_spec(spec, len(vectors)):<30} {size_mb * 1e6 / len(vectors):>8.0f} {size_mb:>8.1f} "
+                  f"{1 - size_mb / baseline_mb:>7.0%} {recall:>8.1%} {hit_rate:>8} {change:>7} "
+                  f"{statistics.median(latencies):>7.2f} {build_time:>7.1f}")
+            del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Near-duplicate chunk collapsing: shrinkage, accuracy and chunks/sec.
+
+Builds synthetic chunks: a set of distinct originals, revisions of some of
+them with a few characters edited (which should be folded into the original),
+and unrelated chunks that reuse the same vocabulary (which must survive).
+Reports how much the index shrinks, how many revisions were caught, any
+distinct chunks wrongly merged, and throughput.
+
+From backend/:
+    python -m bench.near_dedup
+    python -m bench.near_dedup --chunks 20000 --revisions 0.3 --edits 8 --threshold 0.8
+"""
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+
+from scripts.near_dedup import NearDuplicateCollapser
+
+_WORDS = ("pump valve pressure gasket torque flange seal inspection operator maintenance bearing "
+          "shaft coupling alignment lubrication clearance procedure isolate lockout verify record "
+          "supervisor permit hazard tank level sensor calibrate replace tighten check report").split()
+
+
+def make_chunk(rng: random.Random, words: int = 160) -> str:
+    return " ".join(rng.choice(_WORDS) + str(rng.randint(0, 99)) for _ in range(words))
+
+
+def revise(text: str, edits: int, rng: random.Random) -> str:
+    """A few single-character edits, like a revision fixing typos or a part number"""
+    chars = list(text)
+    for _ in range(edits):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz0123456789")
+    return "".join(chars)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=10000, help="Distinct original chunks.")
+    ap.add_argument("--revisions", type=float, default=0.3, help="Fraction of originals that also appear revised.")
+    ap.add_argument("--edits", type=int, default=5, help="Character edits per revision.")
+    ap.add_argument("--threshold", type=float, default=0.85)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    docs, originals = [], set()
+    for i in range(args.chunks):
+        text = make_chunk(rng)
+        originals.add(text)
+        docs.append(Document(page_content=text, metadata={"source": f"v1/doc{i // 20}.pdf", "chunk_number": i % 20}))
+    revised = [
+        Document(page_content=revise(d.page_content, args.edits, rng), metadata={**d.metadata, "source": d.metadata["source"].replace("v1/", "v2/")})
+        for d in rng.sample(docs, int(args.chunks * args.revisions))
+    ]
+    docs += revised
+
+    t0 = time.perf_counter()
+    collapsed = NearDuplicateCollapser(args.threshold).collapse(docs)
+    elapsed = time.perf_counter() - t0
+
+    kept = {d.page_content for d in collapsed}
+    lost_originals = len(originals - kept)
+    missed_revisions = sum(1 for d in revised if d.page_content in kept)
+    print(f"\n{len(docs)} chunks ({len(revised)} revisions with {args.edits} edits), threshold {args.threshold}")
+    print(f"  index          {len(docs)} -> {len(collapsed)} chunks ({1 - len(collapsed) / len(docs):.1%} smaller)")
+    print(f"  revisions      {len(revised) - missed_revisions}/{len(revised)} collapsed")
+    print(f"  false merges   {lost_originals} distinct chunks dropped")
+    print(f"  throughput     {len(docs) / elapsed:,.0f} chunks/s ({elapsed:.1f}s)")
+    if lost_originals:
+        raise SystemExit("Distinct chunks were merged")
+
+
+if __name__ == "__main__":
+    main()
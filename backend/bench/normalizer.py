@@ -0,0 +1,112 @@
+"""Chunk normalizer: golden outputs, equivalence fuzzing and chars/sec.
+
+normalize_chunk / is_mostly_digits replaced four re.sub passes and a
+per-character digit scan in clean_paragraphs. This checks the fused version
+against golden outputs and against the original implementation (kept below
+as the reference) on random text built to hit the edge cases: timestamps
+next to letters, serials split by tabs or newlines, Unicode digits and
+whitespace, symbol runs around removed spans. Then it times both.
+
+From backend/:
+    python -m bench.normalizer
+    python -m bench.normalizer --fuzz 1000000 --chunks 20000
+"""
+import argparse
+import random
+import re
+import time
+
+from scripts.chunk_documents import normalize_chunk, is_mostly_digits
+
+GOLDEN = [
+    ("Shift starts at 07:30 and ends 15:45:00.", "Shift starts at and ends ."),
+    ("Meeting (12:30) moved", "Meeting () moved"),
+    ("Part no. AB 12345 replaced with XYZ6789; see SN-44.", "Part no. replaced with ; see SN-44."),
+    ("AB\t12345 and AB\n123", "and"),
+    ("Torque:  45 Nm\n\n\t(see Fig. 4)", "Torque: 45 Nm (see Fig. 4)"),
+    ("Ratio 123:45 stays, but 1:23 goes", "Ratio 123:45 stays, but goes"),
+    ("  leading and trailing — dashes • bullets  ", "leading and trailing dashes bullets"),
+    ("café naïve © 2024 – résumé", "caf na ve 2024 r sum"),
+    ("Arabic digits ١٢:٣٤ are times too", "Arabic digits are times too"),
+    ("lowercase ab12345 is not a serial, ABC 99 too short", "lowercase ab12345 is not a serial, ABC 99 too short"),
+    ("12:30AB123", "12:30"),
+    ("a#AB123#b", "a b"),
+    ("", ""),
+    ("​  \n", ""),
+]
+
+_ALPHABET = list("abcXYZAB 0123456789:.,;()[]{}-+/=_%#@!\t\n\r é١٢ |*&^$~`'\"<>?\\")
+_WORDS = ("pump valve pressure gasket the of and a to in Procedure Step 3.2: tighten bolts to 45 Nm "
+          "(see Fig. 4) -- Rev. B 10:42 SN AB1234").split()
+
+
+def reference_normalize(chunk: str) -> tuple[str, bool]:
+    """clean_paragraphs' original per-chunk passes; returns (text, kept before the length check)"""
+    chunk = re.sub(r"\b\d{1,2}:\d{2}(:\d{2})?\b", "", chunk)  # timestamps
+    chunk = re.sub(r"[A-Z]{2,}\s?[0-9]{3,}", "", chunk)      # serial-like
+    chunk = re.sub(r"[^A-Za-z0-9.,;:(){}\[\]\-+/=_% ]+", " ", chunk)  # remove symbols
+    chunk = re.sub(r"\s+", " ", chunk).strip()               # collapse whitespace
+    return chunk, not (len(chunk) == 0 or (sum(c.isdigit() for c in chunk) / len(chunk)) > 0.5)
+
+
+def fused_normalize(chunk: str) -> tuple[str, bool]:
+    chunk = normalize_chunk(chunk)
+    return chunk, not is_mostly_digits(chunk)
+
+
+def fuzz_text(rng: random.Random, length: int) -> str:
+    parts, size = [], 0
+    while size < length:
+        r = rng.random()
+        if r < 0.1:
+            part = f"{rng.randint(0, 99)}:{rng.randint(0, 99):02d}" + (f":{rng.randint(0, 99):02d}" if rng.random() < 0.5 else "")
+        elif r < 0.2:
+            part = "".join(rng.choice("ABCXYZ") for _ in range(rng.randint(1, 4))) + rng.choice(["", " ", "\t", "\n"]) + str(rng.randint(0, 99999))
+        elif r < 0.6:
+            part = rng.choice(["pump", "Valve", "the", "AB", "x", " ", "  "])
+        else:
+            part = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 5)))
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def throughput(fn, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return sum(map(len, texts)) / (time.perf_counter() - start)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--fuzz", type=int, default=300000, help="Random strings compared against the reference.")
+    ap.add_argument("--chunks", type=int, default=5000, help="Chunks per throughput run.")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    for text, expected in GOLDEN:
+        for name, fn in (("reference", reference_normalize), ("fused", fused_normalize)):
+            if fn(text)[0] != expected:
+                raise SystemExit(f"{name} golden mismatch for {text!r}: {fn(text)[0]!r} != {expected!r}")
+    print(f"golden      {len(GOLDEN)} cases match")
+
+    rng = random.Random(args.seed)
+    for i in range(args.fuzz):
+        text = fuzz_text(rng, rng.randint(0, 80))
+        if fused_normalize(text) != reference_normalize(text):
+            raise SystemExit(f"Fuzz mismatch on {text!r}: {fused_normalize(text)!r} != {reference_normalize(text)!r}")
+    print(f"fuzz        {args.fuzz} random strings identical")
+
+    corpora = {
+        "prose": [" ".join(rng.choice(_WORDS) for _ in range(170)) for _ in range(args.chunks)],
+        "noisy": [fuzz_text(rng, 1000) for _ in range(args.chunks)],
+    }
+    for name, texts in corpora.items():
+        old = throughput(reference_normalize, texts)
+        new = throughput(fused_normalize, texts)
+        print(f"{name:<11} reference {old / 1e6:6.1f} Mchar/s   fused {new / 1e6:6.1f} Mchar/s  ({new / old:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""PDF parsing throughput: whole-document reader vs page-range ParsePool.
+
+Builds a synthetic corpus of multi-page PDFs (a few small documents plus one
+large one, which is the case that used to pin a single worker), parses it with
+both engines and reports pages/sec. Texts are compared so a speedup can't come
+from dropped pages.
+
+From backend/:
+    python -m bench.pdf_parse
+    python -m bench.pdf_parse --docs 16 --pages 12 --big-pages 600 --workers 8
+    python -m bench.pdf_parse --scanned   # large document is image-only, so every page is OCR'd
+
+On a text-only corpus the two engines should be close (page extraction is
+cheap); the gap opens up on --scanned, where one document's OCR used to run
+on a single core.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fitz
+
+# Keep the OCR cache out of the real cache dir; set before scripts is imported so workers inherit it
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_pdf_cache_")
+
+from scripts.file_readers import FileReader
+from scripts.ocr import OCR_CACHE_PATH
+from scripts.parse_pool import ParsePool
+
+_WORDS = ("pump valve pressure gasket torque flange seal inspection operator "
+          "maintenance bearing shaft coupling alignment lubrication clearance").split()
+_EXTS = {".pdf"}
+
+
+def make_pdf(path: Path, pages: int, rng: random.Random, scanned: bool = False):
+    """Writes a PDF of random text pages. Scanned pages carry only an image, so they go through OCR."""
+    with fitz.open() as doc:
+        for _ in range(pages):
+            page = doc.new_page()
+            lines = [" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(40)]
+            page.insert_text((40, 50), "\n".join(lines), fontsize=9)
+            if scanned:
+                pix = page.get_pixmap(dpi=100)
+                doc.delete_page(-1)
+                doc.new_page().insert_image(fitz.Rect(0, 0, 612, 792), pixmap=pix)
+        doc.save(str(path))
+
+
+def make_corpus(root: Path, docs: int, pages: int, big_pages: int, scanned: bool = False, seed: int = 0) -> tuple[list[Path], int]:
+    rng = random.Random(seed)
+    files = []
+    for i in range(docs):
+        files.append(root / f"doc{i:03d}.pdf")
+        make_pdf(files[-1], pages, rng)
+    if big_pages:
+        files.append(root / "big.pdf")
+        make_pdf(files[-1], big_pages, rng, scanned=scanned)
+    return files, docs * pages + big_pages
+
+
+def clear_ocr_cache():
+    for path in OCR_CACHE_PATH.parent.glob(OCR_CACHE_PATH.name + "*"):
+        path.unlink()
+
+
+def run_whole_document(files: list[Path], workers: int) -> dict[str, str]:
+    """The previous engine: one future per file, each reading the whole document"""
+    reader = FileReader(_EXTS)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return {str(f): text for text, f in executor.map(reader.read_docs, files)}
+
+
+def run_page_ranges(files: list[Path], workers: int, pages_per_task: int) -> dict[str, str]:
+    pool = ParsePool(FileReader(_EXTS), max_workers=workers, pages_per_task=pages_per_task)
+    texts = {}
+    for filename, text, error in pool.parse(files):
+        if error is not None:
+            raise error
+        texts[filename] = text
+    return texts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--docs", type=int, default=8, help="Small documents in the corpus.")
+    ap.add_argument("--pages", type=int, default=10, help="Pages per small document.")
+    ap.add_argument("--big-pages", type=int, default=300, help="Pages in the one large document (0 to omit).")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--pages-per-task", type=int, default=ParsePool.PAGES_PER_TASK)
+    ap.add_argument("--scanned", action="store_true", help="Make the large document image-only (needs tesseract).")
+    args = ap.parse_args()
+    if args.scanned and not shutil.which("tesseract"):
+        ap.error("--scanned needs the tesseract binary on PATH")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files, total_pages = make_corpus(Path(tmp), args.docs, args.pages, args.big_pages, scanned=args.scanned)
+        print(f"Corpus: {len(files)} PDFs, {total_pages} pages, {args.workers} workers")
+
+        clear_ocr_cache()
+        t0 = time.perf_counter()
+        baseline = run_whole_document(files, args.workers)
+        t_base = time.perf_counter() - t0
+
+        clear_ocr_cache()
+        t0 = time.perf_counter()
+        ranged = run_page_ranges(files, args.workers, args.pages_per_task)
+        t_range = time.perf_counter() - t0
+
+        # Same run again: every scanned page is now an OCR cache hit
+        t0 = time.perf_counter()
+        run_page_ranges(files, args.workers, args.pages_per_task)
+        t_warm = time.perf_counter() - t0
+    shutil.rmtree(OCR_CACHE_PATH.parent, ignore_errors=True)
+
+    mismatched = [f for f in baseline if baseline[f] != ranged.get(f)]
+    print(f"whole-document:         {t_base:7.2f}s  {total_pages / t_base:8.1f} pages/s")
+    print(f"page-ranges:            {t_range:7.2f}s  {total_pages / t_range:8.1f} pages/s  ({t_base / t_range:.2f}x)")
+    print(f"page-ranges, warm OCR:  {t_warm:7.2f}s  {total_pages / t_warm:8.1f} pages/s  ({t_base / t_warm:.2f}x)")
+    print(f"text identical: {not mismatched}" + (f"  (mismatched: {mismatched})" if mismatched else ""))
+
+
+if __name__ == "__main__":
+    main()
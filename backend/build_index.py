@@ -2,15 +2,47 @@
 
 From backend/:
     EMBED_DEVICE=cuda python build_index.py --chunk-size 2048 --chunk-overlap 200 --tag _test
+    python build_index.py --update      # nightly: only new/changed/deleted files
 
-Writes bm25{tag}.dill, faiss{tag}.dill, chunked_docs{tag}.json, and
-faiss_embeddings{tag}.pkl. With a tag, prod (untagged) files are left untouched,
-so a test build can be A/B'd and reverted. The parsed-text cache is shared
-(parsing is chunk-size independent), so only chunking + embedding re-run.
+Each build is a new version directory, indexes/versions{tag}/<version>/, with
+the BM25 index (bm25.npz + .vocab.json), the FAISS index (faiss.index), each
+with its chunks in a store the backend memory-maps ({name}.chunks +
+.offsets.npy), the chunk dict and a manifest.json. It becomes current when
+complete; a running backend swaps it in on SIGHUP or POST /reload-index.
+The newest index_keep_versions are kept:
+
+    python build_index.py --list                       # versions, * = current
+    python build_index.py --activate 20250101-020000   # roll back, then reload
+
+With a tag, prod (untagged) versions are left untouched, so a test build can
+be A/B'd and reverted. The parsed-text cache is shared (parsing is chunk-size
+independent), and so is the embedding store cache/embeddings/<model>/, keyed
+by chunk text: a tagged build only encodes chunks no earlier build has embedded.
+Encoded slices are saved to the store as they finish, so an interrupted build
+is resumed by running it again; stored vectors are spot-checked against the
+model before they are reused.
+
+--update re-scans DOCUMENTS against cache/ingest_manifest.json (path, size,
+mtime, sha256): only added or changed files are parsed and re-chunked, deleted
+files are dropped, and only chunks without a cached embedding are encoded.
+Both indexes are then rebuilt from the refreshed chunks into a new version.
+
+Every build also writes indexes/reports{tag}/<version>.json: per-stage wall
+time, throughput (files, pages, chunks, vectors per second) and peak RSS,
+on-disk artifact sizes, and the slowest and failed files. Reports are kept
+after their version is pruned; compare two with python -m bench.build_report.
+
+Each DOCUMENTS folder is its own shard (indexes named after the folder, in
+<version>/<shard>/), searched in parallel and filterable per /chat request.
+--shard rebuilds only the named shards; the others are hard-linked from the
+current version unchanged:
+
+    python build_index.py --update --shard engineering --shard hr
 """
 import argparse
 import yaml
 
+from scripts.index_versions import IndexVersions
 from scripts.retriever_builder import RetrieverBuilder
 
 
@@ -19,8 +51,25 @@ def main():
     ap.add_argument("--chunk-size", type=int, default=None)
     ap.add_argument("--chunk-overlap", type=int, default=None)
     ap.add_argument("--tag", default="")
+    ap.add_argument("--update", action="store_true", help="Incrementally re-ingest new, changed and deleted files.")
+    ap.add_argument("--shard", action="append", metavar="NAME", help="Rebuild only this shard (repeatable); the rest are reused.")
+    ap.add_argument("--list", action="store_true", help="List the built versions and exit.")
+    ap.add_argument("--activate", metavar="VERSION", help="Make a built version current and exit.")
     args = ap.parse_args()
 
+    versions = IndexVersions(args.tag)
+    if args.list:
+        current = versions.current()
+        for version in versions.available():
+            manifest = versions.manifest(version)
+            print(f"{'*' if version == current else ' '} {version}  {manifest.get('chunks', '?')} chunks  "
+                  f"chunk_size={manifest.get('chunk_size')}  {manifest.get('embed_model')}  {manifest.get('faiss_index')}  "
+                  f"shards={','.join(manifest.get('shards', {})) or 'all'}")
+        return
+    if args.activate:
+        versions.activate(args.activate)
+        return
+
     with open("config.yaml", "r") as f:
         cfg = yaml.safe_load(f)
 
@@ -29,10 +78,13 @@ def main():
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
         tag=args.tag,
+        update=args.update,
+        rebuild_shards=args.shard,
     )
-    print(f"[build_index] tag={args.tag!r} chunk_size={builder.chunk_size} overlap={builder.chunk_overlap}")
+    print(f"[build_index] tag={args.tag!r} chunk_size={builder.chunk_size} overlap={builder.chunk_overlap} update={args.update} "
+          f"shards={','.join(args.shard) if args.shard else 'all'}")
     builder.build_retrievers()
-    print("[build_index] Done.")
+    print(f"[build_index] Done. Version {builder.version}")
 
 
 if __name__ == "__main__":
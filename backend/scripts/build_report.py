@@ -0,0 +1,165 @@
+# Standard library imports
+import heapq
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+# Library specific imports
+import psutil
+
+# Local imports
+from .load_utils import CACHE_DIR, INDEX_DIR
+from .manifest import load_json, save_json
+
+def report_dir(tag: str = "") -> Path:
+    """Reports outlive the versions they describe, which are pruned"""
+    return INDEX_DIR / f"reports{tag}"
+
+def directory_sizes(directory: Path) -> dict[str, int]:
+    """Bytes of every file under directory, by path relative to it"""
+    sizes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = Path(root) / name
+            try:
+                sizes[path.relative_to(directory).as_posix()] = path.stat().st_size
+            except OSError:
+                pass  # Replaced while walking
+    return dict(sorted(sizes.items()))
+
+def path_size(path: Path) -> int:
+    """Bytes of a file, or of every file under a directory; 0 if it is gone"""
+    try:
+        return sum(directory_sizes(path).values()) if path.is_dir() else path.stat().st_size
+    except OSError:
+        return 0  # A SQLite -wal / -shm or .tmp file removed while listing
+
+class BuildReport:
+    """
+    Machine-readable record of one index build: wall time, counts, throughput
+    and peak RSS per stage, the slowest and failed files, and the size of
+    what was written. Saved as indexes/reports{tag}/<version>.json, so builds
+    can be compared after their versions are pruned (python -m bench.build_report).
+    """
+    # Counts that get a per-second rate
+    RATES = ("files", "pages", "documents", "chunks", "vectors")
+    SLOWEST = 25
+    # Seconds between RSS samples; parse, chunk and embed workers are counted with the build process
+    SAMPLE_SECONDS = 0.25
+
+    def __init__(self, tag: str = ""):
+        self.tag = tag
+        self.started = time.time()
+        self.stages: dict[str, dict] = {}
+        self.parsed_files = 0
+        self.parsed_pages = 0
+        self.failed: list[dict] = []
+        self._slowest: list[tuple[float, str, int | None]] = []  # min-heap of the SLOWEST longest parses
+
+    @staticmethod
+    def rss() -> int:
+        """Resident bytes of this process and every worker process it started"""
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass  # Exited between listing and sampling
+        return total
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        """
+        Times a stage and samples its peak RSS. Counts set on the yielded dict
+        get a rate; a stage run several times (once per shard) is summed.
+        """
+        counts = {}
+        peak = [self.rss()]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.SAMPLE_SECONDS):
+                peak[0] = max(peak[0], self.rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            seconds = time.perf_counter() - t0
+            stop.set()
+            sampler.join()
+            peak[0] = max(peak[0], self.rss())
+
+            stats = self.stages.setdefault(name, {"seconds": 0.0, "runs": 0, "peak_rss_mb": 0.0})
+            stats["seconds"] = round(stats["seconds"] + seconds, 3)
+            stats["runs"] += 1
+            stats["peak_rss_mb"] = max(stats["peak_rss_mb"], round(peak[0] / (1 << 20), 1))
+            for key, value in counts.items():
+                stats[key] = stats.get(key, 0) + value
+            for key in self.RATES:
+                if key in stats:
+                    stats[f"{key}_per_s"] = round(stats[key] / max(stats["seconds"], 1e-9), 1)
+
+    def file(self, filename: str, seconds: float | None, pages: int | None, error: Exception | None = None):
+        """Records one parsed (or failed) file"""
+        if error is not None:
+            self.failed.append({"file": filename, "error": f"{type(error).__name__}: {error}", "seconds": round(seconds or 0.0, 2)})
+            return
+        self.parsed_files += 1
+        self.parsed_pages += pages or 0
+        if seconds is not None:
+            entry = (seconds, filename, pages)
+            if len(self._slowest) < self.SLOWEST:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def to_dict(self, version: str, manifest: dict, directory: Path) -> dict:
+        index_files = directory_sizes(directory)
+        caches = {path.name: path_size(path) for path in sorted(CACHE_DIR.iterdir())} if CACHE_DIR.is_dir() else {}
+        return {
+            "version": version,
+            "tag": self.tag,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_seconds": round(time.time() - self.started, 1),
+            "peak_rss_mb": max((stats["peak_rss_mb"] for stats in self.stages.values()), default=0.0),
+            "host": {"machine": platform.node(), "cpus": os.cpu_count(), "python": platform.python_version()},
+            # What a build's numbers depend on, so a comparison shows what changed besides the code
+            "settings": {key: value for key, value in manifest.items() if key not in ("files", "shards", "version", "built_at", "build_seconds")},
+            "stages": self.stages,
+            "shards": manifest.get("shards", {}),
+            "slowest_files": [
+                {"file": filename, "seconds": round(seconds, 2), "pages": pages}
+                for seconds, filename, pages in sorted(self._slowest, reverse=True)
+            ],
+            "failed_files": self.failed,
+            "artifacts": {
+                "index_bytes": sum(index_files.values()),
+                "index_files": index_files,
+                "cache_bytes": caches,
+            },
+        }
+
+    def save(self, version: str, manifest: dict, directory: Path) -> Path | None:
+        """Writes the report; the version is already published, so a failure here only warns"""
+        path = report_dir(self.tag) / f"{version}.json"
+        try:
+            save_json(path, self.to_dict(version, manifest, directory), indent=2)
+        except Exception as e:
+            print(f"[WARN] Could not write the build report for {version}: {e}")
+            return None
+        print(f"[REPORT] Build report written to {path}")
+        return path
+
+def load_report(path: Path) -> dict:
+    report = load_json(path, {})
+    if not report:
+        raise FileNotFoundError(f"No build report at {path}")
+    return report
@@ -1,12 +1,14 @@
 # Standard library imports
+import itertools
 import json
 import re
 import os
 import logging
 from collections import defaultdict
-from concurrent.futures import as_completed
-from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
 
 # Library specific imports
 from tqdm import tqdm
@@ -14,13 +16,67 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 # Local imports
+from .build_report import BuildReport
 from .load_utils import CACHE_DIR, DocumentLoader
 from .file_readers import FileReader
+from .manifest import IngestManifest, load_json, save_json
+from .parse_cache import ParseCache
+from .parse_pool import ParsePool
+
+# Chunk normalization in two regex passes, equivalent to the original four
+# substitutions (timestamps, serial-like codes, symbols, whitespace) plus strip:
+#  - _DROP_RE deletes timestamps and serial-like codes. Both branches start with a
+#    [0-9A-Z] class so the engine can skip straight to candidates; the timestamp's
+#    leading \b is checked by a lookbehind once its first digit has matched.
+#  - _SEPARATOR_RE turns every run of characters outside the kept set (spaces
+#    included) into one space, leaving runs that already are a single space alone.
+# bench/normalizer.py checks the equivalence against the original passes.
+_KEPT = r"A-Za-z0-9.,;:(){}\[\]\-+/=_%"
+_DROP_RE = re.compile(r"[\dA-Z](?:(?<=(?<!\w)\d)\d?:\d{2}(?::\d{2})?\b|(?<=[A-Z])[A-Z]+\s?[0-9]{3,})")
+_SEPARATOR_RE = re.compile(f"[^{_KEPT}](?:(?<! )|(?=[^{_KEPT}]))[^{_KEPT}]*")
+_DIGITS = str.maketrans("", "", "0123456789")
+
+def normalize_chunk(chunk: str) -> str:
+    """Drops timestamps and serial-like codes, replaces symbols with spaces and collapses whitespace"""
+    return _SEPARATOR_RE.sub(" ", _DROP_RE.sub("", chunk)).strip(" ")
+
+def is_mostly_digits(chunk: str) -> bool:
+    """True for empty chunks and chunks over half digits (logs, heavy tables). Digits are counted in C via translate."""
+    return not chunk or (len(chunk) - len(chunk.translate(_DIGITS))) * 2 > len(chunk)
+
+def split_and_clean(splitter: RecursiveCharacterTextSplitter, text: str, min_length: int) -> list[str]:
+    """Splits text and returns the cleaned chunks worth indexing, in order"""
+    cleaned = []
+    for chunk in splitter.split_text(text):
+        chunk = normalize_chunk(chunk)
+        if not is_mostly_digits(chunk) and len(chunk) >= min_length:
+            cleaned.append(chunk)
+    return cleaned
+
+# Per-process state for chunking workers, set once by _init_chunk_worker
+_worker_splitter: RecursiveCharacterTextSplitter | None = None
+_worker_min_length = 0
+
+def _init_chunk_worker(chunk_size: int, chunk_overlap: int, min_length: int):
+    global _worker_splitter, _worker_min_length
+    _worker_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    _worker_min_length = min_length
+
+def _chunk_batch(batch: list[tuple[str, str]]) -> list[tuple[str, list[str]]]:
+    """Chunks a batch of (text, source) documents. Plain strings go back, which pickle far cheaper than Documents."""
+    return [
+        (os.path.normpath(source), split_and_clean(_worker_splitter, text, _worker_min_length))
+        for text, source in batch if isinstance(text, str)
+    ]
 
 class DocumentChunker:
-    def __init__(self, folder_paths: list[str] = []):
+    CHUNK_WORKERS = 8
+    BATCH_CHARS = 1_000_000  # Text per chunking task: large enough that IPC is noise, small enough to spread across workers
+
+    def __init__(self, folder_paths: list[str] = [], report: BuildReport | None = None):
         self._splitter_cache = {}
         self.folder_paths = folder_paths
+        self.report = report or BuildReport()
         self.loader = DocumentLoader()
         self._supported_exts = {".docx", ".pptx", ".txt", ".pdf", ".csv"} # List of supported extensions to filter
 
@@ -37,147 +93,302 @@ class DocumentChunker:
 
         for doc in docs:
             if isinstance(doc, Document):
-                split_chunks = splitter.split_text(doc.page_content)
+                text = doc.page_content
             elif isinstance(doc, str):
-                split_chunks = splitter.split_text(doc)
+                text = doc
             else:
                 continue
 
-            chunk_number = 0
-            for chunk in split_chunks:
-                chunk = re.sub(r"\b\d{1,2}:\d{2}(:\d{2})?\b", "", chunk)  # timestamps
-                chunk = re.sub(r"[A-Z]{2,}\s?[0-9]{3,}", "", chunk)      # serial-like
-                chunk = re.sub(r"[^A-Za-z0-9.,;:(){}\[\]\-+/=_% ]+", " ", chunk)  # remove symbols
-                chunk = re.sub(r"\s+", " ", chunk).strip()               # collapse whitespace
-
-                if len(chunk) == 0 or (sum(c.isdigit() for c in chunk) / len(chunk)) > 0.5: # filters logs, heavy tables
-                    continue
-                if len(chunk) >= min_length:
-                    metadata = {
-                        "chunk_number": chunk_number,
-                        "source": source,
-                    }
-                    doc = Document(page_content=chunk, metadata=metadata)
-                    cleaned_chunks.append(doc)
-                    chunk_number += 1
+            for chunk_number, chunk in enumerate(split_and_clean(splitter, text, min_length)):
+                metadata = {
+                    "chunk_number": chunk_number,
+                    "source": source,
+                }
+                cleaned_chunks.append(Document(page_content=chunk, metadata=metadata))
         return cleaned_chunks
     
+    def _load_chunk_cache(self, cache_path) -> dict[str, list[Document]]:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            loaded_by_source = json.load(f)
+        # Validate that loaded data is a dictionary
+        if not isinstance(loaded_by_source, dict):
+            raise ValueError(f"Expected dict from cache, got {type(loaded_by_source).__name__}")
+        return {
+            source: [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in doc_list]
+            for source, doc_list in loaded_by_source.items()
+            if isinstance(doc_list, list)  # Skip invalid entries
+        }
+
+    def _save_chunk_cache(self, cache_path, chunks_by_source: dict[str, list[Document]]):
+        save_json(
+            cache_path,
+            {
+                source: [
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in chunk_list
+                ]
+                for source, chunk_list in chunks_by_source.items()
+            },
+            indent=2,
+        )
+
+    def _iter_files(self) -> Iterator[Path]:
+        """Streams supported files from every configured folder as the concurrent walk finds them"""
+        for path in self.loader.iter_supported_files(self.folder_paths):
+            if path.suffix.lower() in self._supported_exts:
+                yield path
+
+    def _parse_files(self, files: Iterable[Path]) -> Iterator[tuple[str | None, str, Exception | None]]:
+        """Parses files in a process pool as they arrive, yielding (text, filename, error) as each one finishes"""
+        files = iter(files)
+        first = next(files, None)
+        if first is None:
+            return  # Nothing to parse, so don't start the worker processes
+        pool = ParsePool(FileReader(self._supported_exts), max_workers=8)
+        loaded = failed = 0
+        # The total isn't known while discovery is still running
+        with tqdm(desc="Parsing documents", unit="file") as pbar:
+            for filename, text, error in pool.parse(itertools.chain([first], files)):
+                pbar.update(1)
+                self.report.file(filename, *pool.stats.pop(filename, (None, None)), error)
+                if error is not None:
+                    failed += 1
+                    logging.error(f"[Parse Error] {filename}: {error}", exc_info=error)
+                else:
+                    loaded += 1
+                yield text, filename, error
+        print(f"[DEBUG] ← Total successfully loaded documents: {loaded}")
+        print(f"[DEBUG] ← Total failed documents: {failed}")
+
+    def _update_parsed_documents(self, parse_cache: ParseCache, manifest: IngestManifest):
+        """
+        Re-scans the configured folders and parses only files that were added or
+        changed since the manifest was written. Discovery, change detection and
+        parsing run as one stream, so parsing starts with the first changed file
+        found rather than after the whole walk. Deleted files are dropped once
+        the walk is complete. Each parsed document is written to the cache as
+        soon as it finishes. Files that fail or time out are quarantined until
+        their contents change.
+        """
+        parsed = parse_cache.paths()
+        legacy = not len(manifest)
+        quarantined = manifest.quarantined()
+        # Entries whose parsed text went missing must be parsed again
+        for key in [key for key in manifest.entries if key not in parsed and key not in quarantined]:
+            manifest.forget(key)
+
+        seen: set[str] = set()
+        entries: dict[str, dict] = {}
+        known = {sha for sha in parsed.values() if sha}  # Content already in the parse cache
+        queued: set[str] = set()  # Content sent to the parse pool this run
+        duplicates: list[tuple[str, dict]] = []
+        adopted = 0
+
+        def to_parse() -> Iterator[Path]:
+            # Runs on the parse pool's feeder thread, so it must not touch the SQLite cache
+            nonlocal adopted
+            for path, entry in manifest.scan(self._iter_files(), seen):
+                key = os.path.normpath(str(path))
+                # Cached text whose hash still matches is adopted rather than re-parsed. That covers
+                # documents parsed by an interrupted build, and (with no hash to compare) a cache
+                # migrated from before the manifest existed.
+                if key in parsed and (parsed[key] == entry["sha256"] or legacy and parsed[key] is None):
+                    manifest.record(path, entry)
+                    adopted += 1
+                    continue
+                entries[key] = entry
+                # A copy of content that is cached or already being parsed takes its text once parsing is done
+                if entry["sha256"] in known or entry["sha256"] in queued:
+                    duplicates.append((key, entry))
+                    continue
+                queued.add(entry["sha256"])
+                yield path
+
+        failed: dict[str, str] = {}  # sha256 -> reason
+        newly_quarantined = 0
+
+        def store(results: Iterator[tuple[str | None, str, Exception | None]]):
+            nonlocal newly_quarantined
+            for text, filename, error in results:
+                entry = entries.get(filename)
+                if error is not None:
+                    # Drop any stale text from before the file changed
+                    parse_cache.delete([filename])
+                    if entry:
+                        failed[entry["sha256"]] = f"{type(error).__name__}: {error}"
+                        manifest.quarantine(filename, entry, failed[entry["sha256"]])
+                        newly_quarantined += 1
+                    continue
+                parse_cache.put(filename, text, entry["sha256"] if entry else None)
+                if entry:
+                    manifest.record(filename, entry)
+
+        store(self._parse_files(to_parse()))
+
+        # Identical files share one parse. The only cached copy can, rarely, have been
+        # overwritten by its own file changing this run; those few are parsed after all.
+        unresolved = []
+        for key, entry in duplicates:
+            if entry["sha256"] in failed:
+                manifest.quarantine(key, entry, failed[entry["sha256"]])
+                newly_quarantined += 1
+            elif parse_cache.copy(key, entry["sha256"]):
+                manifest.record(key, entry)
+            else:
+                unresolved.append(Path(key))
+        if unresolved:
+            store(self._parse_files(unresolved))
+
+        deleted = manifest.missing(seen)
+        deleted.extend(key for key in parsed if key not in seen and key not in deleted)
+        for key in deleted:
+            manifest.forget(key)
+        parse_cache.delete(deleted)
+
+        if adopted:
+            print(f"[MANIFEST] Adopted {adopted} files from the existing parse cache")
+        if duplicates:
+            print(f"[DEDUP] {len(duplicates) - len(unresolved)} files duplicate content already parsed and were not parsed again")
+        quarantined = {key: reason for key, reason in manifest.quarantined().items() if key not in entries}
+        unchanged = sum(1 for key in manifest.entries if key not in entries and key not in quarantined)
+        print(f"[MANIFEST] {len(entries)} new or changed, {len(deleted)} deleted, {unchanged} unchanged, {len(quarantined)} quarantined")
+        if newly_quarantined:
+            print(f"[QUARANTINE] {newly_quarantined} files failed to parse and will be skipped until they change (see {manifest.path.name})")
+
+    @staticmethod
+    def _group_duplicates(parsed: dict[str, str | None]) -> dict[str, list[str]]:
+        """
+        Groups parsed files by content hash. Returns canonical path -> alias paths,
+        where the canonical path is the first of the group in sorted order, so it
+        is stable across runs. Files without a hash are their own group.
+        """
+        groups = defaultdict(list)
+        for path in sorted(parsed):
+            groups[parsed[path] or path].append(path)
+        return {paths[0]: paths[1:] for paths in groups.values()}
+
+    def _batches(self, raw_documents: Iterable[tuple[str, str]]) -> Iterator[list[tuple[str, str]]]:
+        """Groups documents into batches of about BATCH_CHARS, so one task of many small files weighs the same as one big file"""
+        batch, size = [], 0
+        for text, filename in raw_documents:
+            batch.append((text, filename))
+            size += len(text or "")
+            if size >= self.BATCH_CHARS:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+
+    def _chunk_documents(self, raw_documents: Iterable[tuple[str, str]], total: int, chunk_size: int, chunk_overlap: int) -> dict[str, list[Document]]:
+        chunks_by_source = {}
+        max_workers = self.CHUNK_WORKERS
+        # Workers build the splitter once; tasks carry only text, not the bound method and this chunker
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_chunk_worker, initargs=(chunk_size, chunk_overlap, chunk_size // 10)
+        ) as executor, tqdm(total=total, desc="Chunking documents") as pbar:
+            # Batches are pulled from the cache as workers free up, so the whole corpus is never in memory at once
+            pending = set()
+            for batch in self._batches(raw_documents):
+                if len(pending) >= max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect_chunks(done, chunks_by_source, pbar)
+                future = executor.submit(_chunk_batch, batch)
+                future.batch_size = len(batch)
+                pending.add(future)
+            self._collect_chunks(as_completed(pending), chunks_by_source, pbar)
+        return chunks_by_source
+
+    @staticmethod
+    def _collect_chunks(futures, chunks_by_source: dict[str, list[Document]], pbar):
+        for future in futures:
+            try:
+                for source, chunks in future.result():
+                    if chunks:
+                        chunks_by_source[source] = [
+                            Document(page_content=chunk, metadata={"chunk_number": i, "source": source})
+                            for i, chunk in enumerate(chunks)
+                        ]
+            except Exception as e:
+                print(f"[WARN] Chunking failed for a batch of {future.batch_size} documents: {e}")
+            pbar.update(future.batch_size)
+
     # Runs document chunking in parallel for faster processing
-    def get_chunks(self, chunk_size: int, chunk_overlap: int, tag: str = ""):
+    def get_chunks(self, chunk_size: int, chunk_overlap: int, tag: str = "", update: bool = False):
+        """
+        Returns chunk dict as dict[source] = [docs]. With update=True the
+        folders are re-scanned against the ingest manifest, and only added or
+        changed files are parsed and re-chunked.
+        """
         cache_path = CACHE_DIR / f"chunked_docs{tag}.json"
-        parsed_cache_path = CACHE_DIR / "parsed_text_docs.json"
+        chunk_manifest_path = CACHE_DIR / f"chunk_manifest{tag}.json"
 
         # 1. Try to load chunked docs from cache
+        chunks_by_source = {}
         if cache_path.exists():
             try:
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    loaded_by_source = json.load(f)
-                    # Validate that loaded data is a dictionary
-                    if not isinstance(loaded_by_source, dict):
-                        raise ValueError(f"Expected dict from cache, got {type(loaded_by_source).__name__}")
-                    chunks_by_source = {
-                        source: [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in doc_list]
-                        for source, doc_list in loaded_by_source.items()
-                        if isinstance(doc_list, list)  # Skip invalid entries
-                    }
-                    # Only return if we successfully loaded at least some data
-                    if chunks_by_source:
-                        return chunks_by_source
-                    else:
-                        raise ValueError("No valid data found in cache")
+                chunks_by_source = self._load_chunk_cache(cache_path)
+                # Only return if we successfully loaded at least some data
+                if not chunks_by_source:
+                    raise ValueError("No valid data found in cache")
+                if not update:
+                    return chunks_by_source
             except Exception as e:
                 print(f"[ERROR] Chunked docs could not be loaded. Re-chunking... Exception: {e}")
+                chunks_by_source = {}
 
         # 2. Load or parse raw documents
-        raw_documents = []
-        if parsed_cache_path.exists():
-            print(f"[CACHE] Loaded pre-parsed documents from {parsed_cache_path}")
-            try:
-                with open(parsed_cache_path, "r", encoding="utf-8") as f:
-                    loaded_data = json.load(f)
-                    # Validate that loaded data is a list
-                    if not isinstance(loaded_data, list):
-                        raise ValueError(f"Expected list from parsed cache, got {type(loaded_data).__name__}")
-                    raw_documents = loaded_data
-            except Exception as e:
-                print(f"[WARN] Failed to load parsed cache, will re-parse: {e}")
-                raw_documents = []
-        else:
-            all_files = []
-            for folder in self.folder_paths:
-                all_files.extend(self.loader.gather_supported_files(folder))
-            print(f"[DEBUG] Total discovered files: {len(all_files)}")
-            reader = FileReader(self._supported_exts)
-            skipped = 0
-            with tqdm(total=len(all_files), desc="Parsing documents", unit="file") as pbar, \
-                ProcessPoolExecutor(max_workers=8) as executor:
-                futures = {executor.submit(reader.read_docs, f): f for f in all_files}
-                for future in as_completed(futures):
-                    try:
-                        result = future.result()
-                        if result is None:
-                            skipped += 1
-                            continue
-                        text, filename = result
-                        if filename is not None:
-                            filename = os.path.normpath(filename)
-                        raw_documents.append((text, filename))
-                    except Exception as e:
-                        logging.exception(f"[Thread Error] {e}")
-                    pbar.update(1)
-            print(f"[DEBUG] ← Total successfully loaded documents: {len(raw_documents)}")
-            print(f"[DEBUG] ← Total successfully loaded documents: {len(raw_documents)}")
-            print(f"[DEBUG] ← Total skipped documents: {skipped}")
-            try:
-                parsed_cache_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(parsed_cache_path, "w", encoding="utf-8") as f:
-                    json.dump(raw_documents, f, ensure_ascii=False)
-            except Exception as e:
-                print(f"[WARN] Failed to cache parsed docs: {e}")
-
-        if not raw_documents:
-            raise ValueError("No documents were loaded. Cannot create indexes.")
-
-        # 3. Chunk and clean in parallel
-        results = []
-        with ProcessPoolExecutor(max_workers=8) as executor:
-            futures = [
-                executor.submit(self.clean_paragraphs, [text], chunk_size=chunk_size, chunk_overlap=chunk_overlap, min_length=(chunk_size // 10), source=filename)
-                for text, filename in raw_documents
-            ]
-            for future in tqdm(as_completed(futures), total=len(raw_documents), desc=f"Chunking documents"):
+        manifest = IngestManifest()
+        parse_cache = ParseCache()
+        try:
+            if len(parse_cache) and not update:
+                print(f"[CACHE] Using pre-parsed documents from {parse_cache.path}")
+            else:
                 try:
-                    results.extend(future.result())
-                except Exception as e:
-                    print(f"[WARN] Chunking failed for a document: {e}")
+                    with self.report.stage("parse") as stage:
+                        self._update_parsed_documents(parse_cache, manifest)
+                        stage.update(files=self.report.parsed_files, pages=self.report.parsed_pages, failed=len(self.report.failed))
+                finally:
+                    manifest.save()
 
-        # 4. Sort by source
-        chunks_by_source = defaultdict(list)
-        for doc in results:
-            source = doc.metadata.get("source", "unknown")
+            parsed = parse_cache.paths()
+            if not parsed:
+                raise ValueError("No documents were loaded. Cannot create indexes.")
 
-            chunks_by_source[source].append(doc)
+            # 3. Chunk and clean in parallel, once per unique file, reusing chunks whose source is unchanged
+            groups = self._group_duplicates(parsed)
+            if len(groups) < len(parsed):
+                print(f"[DEDUP] {len(parsed)} files hold {len(groups)} unique documents; copies are indexed once")
+            chunk_manifest = load_json(chunk_manifest_path, {}) if chunks_by_source else {}
+            stale = [
+                filename for filename in groups
+                if filename not in chunks_by_source or chunk_manifest.get(filename) != manifest.digest(filename)
+            ]
+            chunks_by_source = {source: chunks for source, chunks in chunks_by_source.items() if source in groups}
+            for filename in stale:
+                chunks_by_source.pop(filename, None)
+            if update:
+                print(f"[MANIFEST] Re-chunking {len(stale)} of {len(groups)} documents")
+            raw_documents = parse_cache.iter_documents(None if len(stale) == len(parsed) else stale)
+            with self.report.stage("chunk") as stage:
+                chunked = self._chunk_documents(raw_documents, len(stale), chunk_size, chunk_overlap)
+                stage.update(documents=len(stale), chunks=sum(len(chunk_list) for chunk_list in chunked.values()))
+            chunks_by_source.update(chunked)
+        finally:
+            parse_cache.close()
 
-        for chunk_list in chunks_by_source.values():
-            chunk_list.sort(key=lambda d: d.metadata.get("chunk_number", 0))
+        # Every other path holding the same content is kept on the chunks of the canonical copy
+        for source, chunk_list in chunks_by_source.items():
+            for doc in chunk_list:
+                if groups[source]:
+                    doc.metadata["aliases"] = groups[source]
+                else:
+                    doc.metadata.pop("aliases", None)
 
-        # 5. Cache chunked docs by source
+        # 4. Cache chunked docs by source
         try:
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(
-                {
-                    source: [
-                        {"page_content": doc.page_content, "metadata": doc.metadata}
-                        for doc in chunk_list
-                    ]
-                    for source, chunk_list in chunks_by_source.items()
-                },
-                f,  
-                indent=2,
-                ensure_ascii=False,
-            )
+            self._save_chunk_cache(cache_path, chunks_by_source)
+            save_json(chunk_manifest_path, {source: manifest.digest(source) for source in chunks_by_source})
         except Exception as e:
             print(f"[WARN] Failed to cache parsed docs: {e}")
 
-        return chunks_by_source
\ No newline at end of file
+        return chunks_by_source
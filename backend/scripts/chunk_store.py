@@ -0,0 +1,86 @@
+# Standard library imports
+import json
+import mmap
+import os
+from collections.abc import Mapping
+from pathlib import Path
+
+# Library specific imports
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+class ChunkStore(Docstore):
+    """
+    Read-only, memory-mapped docstore for a FAISS index: row i of the index is
+    chunk i. Chunks are stored as compact JSON records back to back in
+    <path>.chunks, with their byte offsets in <path>.offsets.npy. Opening it maps
+    both files without reading them, so startup costs nothing per chunk, and
+    processes serving the same index share one copy of the pages. A chunk is
+    only decoded when a search returns it.
+    """
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._offsets = np.load(self._file(self.path, ".offsets.npy"), mmap_mode="r")
+        with open(self._file(self.path, ".chunks"), "rb") as f:
+            # An empty file can't be mapped
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    @classmethod
+    def write(cls, path: str | Path, docs: list[Document]):
+        """Writes docs in index row order, each file to a temp name renamed into place"""
+        path = Path(path)
+        offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+        chunks_path = cls._file(path, ".chunks")
+        with open(chunks_path.with_name(chunks_path.name + ".tmp"), "wb") as f:
+            for i, doc in enumerate(docs):
+                record = json.dumps([doc.page_content, doc.metadata], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                f.write(record)
+                offsets[i + 1] = offsets[i] + len(record)
+        offsets_path = cls._file(path, ".offsets.npy")
+        with open(offsets_path.with_name(offsets_path.name + ".tmp"), "wb") as f:
+            np.save(f, offsets)
+        os.replace(chunks_path.with_name(chunks_path.name + ".tmp"), chunks_path)
+        os.replace(offsets_path.with_name(offsets_path.name + ".tmp"), offsets_path)
+
+    @classmethod
+    def exists(cls, path: str | Path) -> bool:
+        path = Path(path)
+        return cls._file(path, ".chunks").exists() and cls._file(path, ".offsets.npy").exists()
+
+    @staticmethod
+    def _file(path: Path, suffix: str) -> Path:
+        # Appended, not with_suffix: index tags may contain dots
+        return path.with_name(path.name + suffix)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def search(self, search: int | str) -> Document | str:
+        """The chunk at an index row"""
+        row = int(search)
+        if not 0 <= row < len(self):
+            return f"ID {search} not found."
+        page_content, metadata = json.loads(self._data[self._offsets[row]:self._offsets[row + 1]])
+        return Document(page_content=page_content, metadata=metadata)
+
+    def row_ids(self) -> "RowIds":
+        """The index_to_docstore_id mapping LangChain's FAISS expects, without a dict entry per chunk"""
+        return RowIds(len(self))
+
+class RowIds(Mapping):
+    """Identity mapping from index row to docstore id, for a ChunkStore"""
+    def __init__(self, size: int):
+        self._size = size
+
+    def __getitem__(self, row) -> int:
+        row = int(row)
+        if not 0 <= row < self._size:
+            raise KeyError(row)
+        return row
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        return iter(range(self._size))
@@ -25,6 +25,62 @@ OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", config.get("ollama_keep_
 # entirely to Ollama; set to "cuda" for fast offline index builds.
 EMBED_DEVICE = os.environ.get("EMBED_DEVICE", config.get("embed_device", "cpu"))
 
+# Embedding runtime: "torch", or "onnx-int8" for the model exported to ONNX with
+# dynamic int8 quantization (CPU only; needs optimum-onnx[onnxruntime]).
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", config.get("embed_backend", "torch"))
+
+# CPU index builds: encoder processes and torch threads per process. 0 picks
+# one process per 4 cores, with the cores split evenly between them.
+EMBED_WORKERS = int(os.environ.get("EMBED_WORKERS", config.get("embed_workers", 0)))
+EMBED_THREADS = int(os.environ.get("EMBED_THREADS", config.get("embed_threads", 0)))
+
+# Embedding model. Cached embeddings are keyed by it, so changing it never mixes vector spaces.
+EMBED_MODEL = os.environ.get("EMBED_MODEL", config.get("embed_model", "BAAI/bge-large-en-v1.5"))
+
+# Query embeddings kept in memory (about 4 KB each for bge-large), shared by
+# every retriever in the process, so a repeated query skips the encoder. 0 disables.
+QUERY_EMBED_CACHE_SIZE = int(os.environ.get("QUERY_EMBED_CACHE_SIZE", config.get("query_embed_cache_size", 2048)))
+
+# Precision of the on-disk embedding store: float32, or float16 to halve it.
+# Vectors are widened back to float32 before they reach FAISS.
+EMBED_DTYPE = os.environ.get("EMBED_DTYPE", config.get("embed_dtype", "float32"))
+
+# FAISS index type, as a faiss index_factory string: "Flat" (exact, the default),
+# "HNSW32", "IVF{nlist},Flat", "IVF{nlist},PQ64", ... {nlist} is sized to the
+# corpus. nprobe (IVF) and efSearch (HNSW) trade query speed for recall and are
+# applied at load time, so they can be tuned without rebuilding.
+FAISS_INDEX = os.environ.get("FAISS_INDEX", config.get("faiss_index", "Flat"))
+FAISS_NPROBE = int(os.environ.get("FAISS_NPROBE", config.get("faiss_nprobe", 16)))
+FAISS_EF_SEARCH = int(os.environ.get("FAISS_EF_SEARCH", config.get("faiss_ef_search", 64)))
+
+# Precision the index stores vectors at: "float32", "float16" or "int8" (scalar
+# quantized, a quarter of the memory), applied to faiss_index's flat storage.
+# faiss_pca_dim > 0 also PCA-reduces the 1024-d vectors to that many dimensions.
+# Both need a rebuild; compare them with python -m bench.faiss_precision.
+FAISS_PRECISION = os.environ.get("FAISS_PRECISION", config.get("faiss_precision", "float32"))
+FAISS_PCA_DIM = int(os.environ.get("FAISS_PCA_DIM", config.get("faiss_pca_dim", 0)))
+
+# Chunks at least this similar (estimated Jaccard over word shingles) are
+# collapsed into one at index build time. 0 disables near-duplicate collapsing.
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", config.get("near_dup_threshold", 0.85)))
+
+# Each index build is kept in its own versioned directory; this many of the
+# newest are kept for rollback (0 keeps them all). The served one is never removed.
+INDEX_KEEP_VERSIONS = int(os.environ.get("INDEX_KEEP_VERSIONS", config.get("index_keep_versions", 3)))
+
+# Per-query time budgets for the BM25 and dense (query embedding + FAISS) legs
+# of retrieval, which run concurrently. A leg that misses its budget or fails is
+# dropped and the other leg's results are used. 0 waits indefinitely.
+BM25_BUDGET_MS = int(os.environ.get("BM25_BUDGET_MS", config.get("bm25_budget_ms", 1000)))
+DENSE_BUDGET_MS = int(os.environ.get("DENSE_BUDGET_MS", config.get("dense_budget_ms", 2000)))
+
+# Retrieval results kept in memory, keyed by normalized query, result count and
+# index version, so a repeated question skips BM25, dense search and MMR. Entries
+# expire after result_cache_ttl seconds (0 never) and a new index version never
+# sees an older one's. result_cache_size 0 disables.
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", config.get("result_cache_size", 1024)))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", config.get("result_cache_ttl", 3600)))
+
 class ModelConfig:
     TONE: str = "Formal"
     # MODEL: str = "gpt2"
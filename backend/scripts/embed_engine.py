@@ -0,0 +1,165 @@
+# Standard library imports
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Iterator
+
+# Library specific imports
+import numpy as np
+from tqdm import tqdm
+
+# Per-process state for encoder workers, set once by _init_embed_worker
+_worker_model = None
+
+def _init_embed_worker(model_name: str, model_kwargs: dict, threads: int, cores: "multiprocessing.Queue"):
+    """Pins the worker to its own cores and torch / ONNX Runtime thread count, then loads the model once"""
+    global _worker_model
+    if hasattr(os, "sched_setaffinity"):
+        assigned = cores.get()
+        if assigned:
+            os.sched_setaffinity(0, assigned)
+
+    # The spawned worker re-imports the main module, which usually imports torch before this runs;
+    # OMP_NUM_THREADS / MKL_NUM_THREADS come from the parent (_thread_env), this sizes torch's own pool
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    model_kwargs = {**model_kwargs, "device": "cpu"}
+    if model_kwargs.get("backend") == "onnx":
+        import onnxruntime
+        # ONNX Runtime sizes its own pool to every core unless told otherwise
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+        model_kwargs["model_kwargs"] = {**model_kwargs.get("model_kwargs", {}), "session_options": session_options}
+    _worker_model = SentenceTransformer(model_name, **model_kwargs)
+
+@contextmanager
+def _thread_env(threads: int):
+    """
+    Sets OMP_NUM_THREADS / MKL_NUM_THREADS while workers are started. A spawned
+    child inherits the environment at start, before it imports anything, so its
+    OpenMP / MKL pools are sized to match; the parent's own are already built.
+    """
+    saved = {var: os.environ.get(var) for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")}
+    os.environ.update({var: str(threads) for var in saved})
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def _encode_batches(model, batches: list[list[str]]) -> np.ndarray:
+    """Encodes each length bucket as one batch, so padding is bounded by the bucket's spread"""
+    return np.concatenate([
+        model.encode(batch, batch_size=len(batch), show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=True)
+        for batch in batches
+    ])
+
+def _encode_task(batches: list[list[str]]) -> np.ndarray:
+    return _encode_batches(_worker_model, batches)
+
+class CpuEmbedder:
+    """
+    CPU embedding engine for index builds. Chunks are sorted by length and cut
+    into batches of roughly BATCH_CHARS characters, so a batch of short chunks is
+    large and a batch of long ones small, and no batch pads 100-character chunks
+    out to 2000. Batches are grouped into tasks of about TASK_TEXTS chunks and
+    spread over worker processes, each holding its own model with torch pinned
+    to a disjoint set of cores. Finished tasks are handed to on_result as they
+    arrive, so vectors stream into the cache instead of piling up in memory.
+    """
+    BATCH_CHARS = 64_000
+    MAX_BATCH = 256
+    TASK_TEXTS = 2000
+
+    def __init__(self, model_name: str, workers: int = 0, threads: int = 0, model_kwargs: dict = None):
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        # One process per 4 cores by default: bge-large scales well to ~4 threads, then memory bandwidth wins
+        self.workers = workers or max(1, cpus // 4)
+        self.threads = threads or max(1, cpus // self.workers)
+        self.model_name = model_name
+        self.model_kwargs = model_kwargs or {}
+        self.cpus = cpus
+
+    def buckets(self, texts: list[str]) -> list[list[str]]:
+        """Length-sorted batches of at most BATCH_CHARS characters (and MAX_BATCH chunks) each"""
+        batches, batch, chars = [], [], 0
+        for text in sorted(texts, key=len):
+            if batch and (chars + len(text) > self.BATCH_CHARS or len(batch) >= self.MAX_BATCH):
+                batches.append(batch)
+                batch, chars = [], 0
+            batch.append(text)
+            chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _tasks(self, texts: list[str]) -> Iterator[list[list[str]]]:
+        task, size = [], 0
+        for batch in self.buckets(texts):
+            task.append(batch)
+            size += len(batch)
+            if size >= self.TASK_TEXTS:
+                yield task
+                task, size = [], 0
+        if task:
+            yield task
+
+    def encode(self, texts: list[str], on_result: Callable[[list[str], np.ndarray], None], model=None) -> float:
+        """
+        Encodes texts, calling on_result(texts, vectors) once per finished task.
+        With a single worker, an already loaded model is used in-process instead
+        of loading another copy. Returns chunks/sec.
+        """
+        t0 = time.time()
+        with tqdm(total=len(texts), desc="Generating embeddings") as pbar:
+            if self.workers == 1 and model is not None:
+                import torch
+                torch.set_num_threads(self.threads)
+                for task in self._tasks(texts):
+                    on_result([text for batch in task for text in batch], _encode_batches(model, task))
+                    pbar.update(sum(map(len, task)))
+            else:
+                self._encode_parallel(texts, on_result, pbar)
+
+        elapsed = max(time.time() - t0, 1e-9)
+        rate = len(texts) / elapsed
+        print(f"[EMBED] Encoded {len(texts)} chunks in {elapsed:.1f}s: {rate:.1f} chunks/s "
+              f"({self.workers} workers x {self.threads} threads on {self.cpus} CPUs)")
+        return rate
+
+    def _encode_parallel(self, texts: list[str], on_result: Callable[[list[str], np.ndarray], None], pbar):
+        # spawn, not fork: forking a parent that already holds torch's thread pools can deadlock
+        context = multiprocessing.get_context("spawn")
+        cores = context.Queue()
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        for worker in range(self.workers):
+            cores.put(set(available[worker * self.threads:(worker + 1) * self.threads]))
+
+        def collect(futures):
+            for future in futures:
+                on_result(future.texts, future.result())
+                pbar.update(len(future.texts))
+
+        # Workers start on demand as tasks are submitted, so the environment stays set for the whole pool
+        with _thread_env(self.threads), ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_embed_worker, initargs=(self.model_name, self.model_kwargs, self.threads, cores),
+        ) as executor:
+            # Bounded in flight, so finished vectors are written out while later tasks run
+            pending = set()
+            for task in self._tasks(texts):
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = executor.submit(_encode_task, task)
+                future.texts = [text for batch in task for text in batch]
+                pending.add(future)
+            collect(as_completed(pending))
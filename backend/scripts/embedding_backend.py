@@ -0,0 +1,108 @@
+# Standard library imports
+import platform
+import re
+import unicodedata
+from pathlib import Path
+
+# Library specific imports
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# Local imports
+from . import config
+from .load_utils import CACHE_DIR
+from .lru_cache import LRUCache
+
+ONNX_DIR = CACHE_DIR / "onnx"
+BACKENDS = ("torch", "onnx-int8")
+# Query embeddings of every retriever in the process, keyed by (model, normalized query)
+QUERY_CACHE = LRUCache(config.QUERY_EMBED_CACHE_SIZE, sizeof=lambda vector: vector.nbytes)
+
+def quantization_config() -> str:
+    """The sentence-transformers dynamic int8 preset whose kernels this CPU has"""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        flags = set(re.findall(r"\w+", Path("/proc/cpuinfo").read_text()))
+    except OSError:
+        flags = set()
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    return "avx512" if "avx512f" in flags else "avx2"
+
+def model_id(backend: str = None) -> str:
+    """
+    Identity of the vectors a backend produces. int8 vectors are close to, not
+    equal to, float32 ones, so the embedding store keys them separately.
+    """
+    backend = backend or config.EMBED_BACKEND
+    if backend == "torch":
+        return config.EMBED_MODEL
+    return f"{config.EMBED_MODEL}+{backend}-{quantization_config()}"
+
+def sentence_transformer_args(backend: str = None, device: str = None) -> tuple[str, dict]:
+    """(model name or path, SentenceTransformer kwargs) for a backend, exporting the ONNX model on first use"""
+    backend = backend or config.EMBED_BACKEND
+    device = device or config.EMBED_DEVICE
+    if backend == "torch":
+        return config.EMBED_MODEL, {"device": device}
+    if backend != "onnx-int8":
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+    if device != "cpu":
+        print(f"[EMBED] The {backend} backend runs on CPU; ignoring EMBED_DEVICE={device}")
+    export_dir, file_name = _export_onnx_int8(config.EMBED_MODEL, quantization_config())
+    return str(export_dir), {"device": "cpu", "backend": "onnx", "model_kwargs": {"file_name": file_name}}
+
+def load_embeddings(backend: str = None, device: str = None) -> HuggingFaceEmbeddings:
+    """The embedding model used for both index builds and queries"""
+    model_name, model_kwargs = sentence_transformer_args(backend, device)
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+
+def normalize_query(query: str) -> str:
+    """
+    Unicode NFC with whitespace runs collapsed: the tokenizer sees the same
+    tokens either way. Case is kept, since not every embed_model is uncased.
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+def embed_query(embeddings: Embeddings, query: str) -> list[float]:
+    """
+    embeddings.embed_query through QUERY_CACHE, so a repeated query (a
+    follow-up, a mixed query's retrieval step, every index of an eval --joint
+    ensemble) never reaches the encoder again
+    """
+    # A model exported to ONNX is loaded from its own directory, so model_name tells backends apart too
+    key = (getattr(embeddings, "model_name", type(embeddings).__name__), normalize_query(query))
+    vector = QUERY_CACHE.get(key)
+    if vector is None:
+        # float32 holds a bge-large vector in 4 KB, not the ~32 KB of a list of floats
+        vector = np.asarray(embeddings.embed_query(key[1]), dtype=np.float32)
+        QUERY_CACHE.put(key, vector)
+    return vector.tolist()
+
+def _export_onnx_int8(model_name: str, preset: str) -> tuple[Path, str]:
+    """
+    Exports model_name to ONNX and quantizes it with dynamic int8 (weights int8,
+    activations quantized per batch at run time, no calibration data needed).
+    The export is cached under cache/onnx/, so only the first use pays for it.
+    """
+    export_dir = ONNX_DIR / re.sub(r"[^\w.-]+", "_", model_name)
+    file_name = f"onnx/model_qint8_{preset}.onnx"
+    if (export_dir / file_name).exists():
+        return export_dir, file_name
+
+    try:
+        import optimum.onnxruntime  # noqa: F401
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    except ImportError as e:
+        # optimum 2.x ships ONNX Runtime support separately
+        raise RuntimeError("The onnx-int8 embedding backend needs ONNX Runtime: pip install \"optimum-onnx[onnxruntime]\"") from e
+
+    print(f"[EMBED] Exporting {model_name} to ONNX with {preset} int8 quantization...")
+    # Loads the hub's ONNX weights if it has them, otherwise exports from PyTorch
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save_pretrained(str(export_dir))
+    export_dynamic_quantized_onnx_model(model, preset, str(export_dir))
+    print(f"[EMBED] Saved {export_dir / file_name}")
+    return export_dir, file_name
@@ -0,0 +1,181 @@
+# Standard library imports
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+
+# Library specific imports
+import numpy as np
+
+# Local imports
+from .load_utils import CACHE_DIR
+
+EMBEDDING_STORE_DIR = CACHE_DIR / "embeddings"
+
+class EmbeddingStore:
+    """
+    Content-addressed embedding cache shared by every index tag and chunk size.
+    Vectors are keyed by the sha256 of the model name and the whitespace-normalized
+    chunk text, so any build reuses every chunk any earlier build has embedded.
+
+    One directory per model holds append-only segments: a contiguous .npy matrix
+    (float32, or float16 to halve it) plus a sidecar .ids.npy of keys, one per
+    row. Segments are memory-mapped on load, so opening the store costs no copy
+    and no unpickling. A build appends one segment for the chunks it encoded;
+    once there are more than MAX_SEGMENTS they are merged into one.
+
+    Builds append a segment per encoded slice, so the segments double as
+    checkpoints: an interrupted build loses at most the slice in flight, and the
+    next one only encodes what is still missing. Cached vectors are only trusted
+    after verify() re-encodes a sample of them and finds them unchanged.
+    """
+    MAX_SEGMENTS = 8
+    VERIFY_SAMPLE = 8
+    # Lowest cosine at which a stored vector counts as the model's; leaves room for GPU vs CPU kernels and float16 storage
+    MIN_COSINE = 0.98
+
+    def __init__(self, model: str, dtype: str = "float32", root: Path = EMBEDDING_STORE_DIR):
+        self.model = model
+        self.dir = Path(root) / re.sub(r"[^\w.-]+", "_", model)
+        self.dtype = np.dtype(dtype)
+        self._segments: list[tuple[Path, np.ndarray]] = []
+        self._rows: dict[bytes, tuple[int, int]] = {}  # key -> (segment, row)
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\n{' '.join(text.split())}".encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, text: str) -> bool:
+        return self.key(text) in self._rows
+
+    def load(self) -> int:
+        """Maps every segment into memory and returns how many vectors are available. Unreadable segments are skipped."""
+        self._segments, self._rows = [], {}
+        dim = None
+        for path in sorted(self.dir.glob("*.ids.npy")):
+            vectors_path = path.with_name(path.name.replace(".ids.npy", ".npy"))
+            try:
+                vectors = np.load(vectors_path, mmap_mode="r")
+                ids = np.load(path)
+                if vectors.ndim != 2 or ids.shape != (len(vectors), 32):
+                    raise ValueError(f"{len(vectors)} vectors for {len(ids)} ids")
+                if dim is not None and vectors.shape[1] != dim:
+                    raise ValueError(f"{vectors.shape[1]}-dim vectors in a {dim}-dim store")
+                dim = vectors.shape[1]
+            except Exception as e:
+                print(f"[WARN] Skipping embedding segment {vectors_path.name}: {e}")
+                continue
+            segment = len(self._segments)
+            self._segments.append((vectors_path, vectors))
+            raw = ids.tobytes()
+            for row in range(len(ids)):
+                self._rows[raw[row * 32:(row + 1) * 32]] = (segment, row)
+        return len(self._rows)
+
+    @staticmethod
+    def agreement(stored: np.ndarray, fresh: np.ndarray) -> float:
+        """Lowest cosine similarity between matching rows"""
+        stored = np.asarray(stored, dtype=np.float32)
+        fresh = np.asarray(fresh, dtype=np.float32)
+        if stored.shape != fresh.shape:
+            return -1.0
+        norms = np.linalg.norm(stored, axis=1) * np.linalg.norm(fresh, axis=1)
+        return float(np.min(np.einsum("ij,ij->i", stored, fresh) / np.maximum(norms, 1e-12)))
+
+    def verify(self, texts: list[str], encode) -> float:
+        """
+        Re-encodes an evenly spread sample of texts already in the store with
+        encode (texts -> vectors) and returns the lowest cosine against the stored
+        vectors. Below MIN_COSINE the store does not hold this model's vectors for
+        these texts: the model's weights changed under the same name, or keys and
+        vectors came apart.
+        """
+        if not texts:
+            return 1.0
+        sample = [texts[i] for i in np.unique(np.linspace(0, len(texts) - 1, self.VERIFY_SAMPLE).astype(int))]
+        return self.agreement(self.vectors(self.locate(sample)), encode(sample))
+
+    def missing(self, texts: list[str]) -> list[str]:
+        """The texts with no stored embedding"""
+        return [text for text in texts if self.key(text) not in self._rows]
+
+    def add(self, texts: list[str], vectors: np.ndarray):
+        """Appends vectors for texts as a new segment; they replace any stored for the same texts"""
+        if not len(texts):
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, so builds for different tags can append at the same time
+        path = self.dir / f"{time.time_ns()}-{os.getpid()}.npy"
+        keys = [self.key(text) for text in texts]
+        self._write(path, keys, vectors)
+        segment = len(self._segments)
+        self._segments.append((path, np.load(path, mmap_mode="r")))
+        for row, key in enumerate(keys):
+            self._rows[key] = (segment, row)
+
+    def compact(self, force: bool = False):
+        """Merges all segments into one once there are more than MAX_SEGMENTS"""
+        if len(self._segments) <= (1 if force else self.MAX_SEGMENTS):
+            return
+        keys = list(self._rows)
+        merged = self.vectors([self._rows[key] for key in keys])
+        old = [path for path, _ in self._segments]
+        self._write(self.dir / f"{time.time_ns()}-{os.getpid()}.npy", keys, merged)
+        del merged
+        self._segments, self._rows = [], {}  # Drop the mappings before deleting the files under them
+        for path in old:
+            try:
+                path.with_name(path.name.replace(".npy", ".ids.npy")).unlink()
+                path.unlink()
+            except OSError as e:
+                # Another process may still have it mapped (Windows); its keys are in the merged segment anyway
+                print(f"[WARN] Could not remove embedding segment {path.name}: {e}")
+        self.load()
+        print(f"[EMBED] Compacted {len(old)} embedding segments into one ({len(self)} vectors)")
+
+    def _write(self, path: Path, keys: list[bytes], vectors: np.ndarray):
+        """
+        Writes the vectors, then the ids, each to a temp name renamed into place.
+        load() only looks for ids files and rejects a pair whose lengths disagree,
+        so a crash mid-write never pairs ids with the wrong vectors.
+        """
+        ids_path = path.with_name(path.name.replace(".npy", ".ids.npy"))
+        for target, array in ((path, np.ascontiguousarray(vectors, dtype=self.dtype)), (ids_path, self._pack(keys))):
+            tmp_path = target.with_name(target.name + ".tmp")
+            # np.save on an open file keeps it from appending another .npy suffix
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, target)
+
+    @staticmethod
+    def _pack(keys: list[bytes]) -> np.ndarray:
+        # Raw uint8 rows: an "S32" array would strip digests that end in null bytes
+        return np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 32)
+
+    def locate(self, texts: list[str]) -> list[tuple[int, int]]:
+        """(segment, row) of each text; every text must be in the store"""
+        return [self._rows[self.key(text)] for text in texts]
+
+    def vectors(self, locations: list[tuple[int, int]]) -> np.ndarray:
+        """
+        float32 matrix of the given (segment, row) locations. When they are exactly
+        rows 0..n-1 of a single float32 segment, the mapping itself comes back without a copy.
+        """
+        if not locations:
+            return np.empty((0, 0), dtype=np.float32)
+        first = self._segments[locations[0][0]][1]
+        if (first.dtype == np.float32 and len(locations) == len(first)
+                and all(loc == (locations[0][0], i) for i, loc in enumerate(locations))):
+            return first
+        matrix = np.empty((len(locations), first.shape[1]), dtype=np.float32)
+        by_segment: dict[int, tuple[list[int], list[int]]] = {}
+        for i, (segment, row) in enumerate(locations):
+            positions, rows = by_segment.setdefault(segment, ([], []))
+            positions.append(i)
+            rows.append(row)
+        for segment, (positions, rows) in by_segment.items():
+            matrix[positions] = self._segments[segment][1][rows]
+        return matrix
@@ -0,0 +1,120 @@
+# Standard library imports
+import math
+import os
+import re
+import time
+
+# Library specific imports
+import faiss
+import numpy as np
+
+# Vectors sampled to train IVF centroids and PQ codebooks
+TRAIN_POINTS = 100_000
+# Fewest training vectors per k-means centroid (faiss's min_points_per_centroid); with fewer it
+# warns and the centroids, and so IVF recall, are poor
+MIN_POINTS_PER_CENTROID = 39
+
+# index_factory storage for each vector precision: float16 halves Flat storage, int8 quarters it
+PRECISIONS = {"float32": "Flat", "float16": "SQfp16", "int8": "SQ8"}
+
+def resolve_spec(spec: str, n: int) -> str:
+    """
+    Fills an {nlist} placeholder in a faiss index_factory string with about
+    4 * sqrt(n) lists, rounded to a power of two, so "IVF{nlist},Flat" keeps
+    the same recall / speed balance as the corpus grows. Capped so every list
+    gets MIN_POINTS_PER_CENTROID training vectors, with at least 16 lists.
+    """
+    nlist = 2 ** max(4, round(math.log2(4 * math.sqrt(max(n, 1)))))
+    while nlist > 16 and nlist * MIN_POINTS_PER_CENTROID > n:
+        nlist //= 2
+    return spec.replace("{nlist}", str(nlist))
+
+def apply_precision(spec: str, precision: str = "float32", pca_dim: int = 0) -> str:
+    """
+    Rewrites an index_factory string to hold its vectors at a lower precision.
+    Flat storage (a bare "Flat", an IVF's ",Flat", an HNSW graph's implicit
+    flat storage) becomes float16 or int8 scalar quantization, searched
+    without decoding to float32, and pca_dim > 0 prepends a PCA down to that
+    many dimensions, applied to queries too. Storage that is already
+    compressed (PQ, SQ) is kept as it is.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown faiss precision {precision!r}; expected one of {', '.join(PRECISIONS)}")
+    parts = spec.split(",")
+    if precision != "float32":
+        if parts[-1] == "Flat":
+            parts[-1] = PRECISIONS[precision]
+        elif re.fullmatch(r"HNSW\d+", parts[-1]):
+            parts.append(PRECISIONS[precision])
+    if pca_dim and not parts[0].startswith(("PCA", "OPQ")):
+        parts.insert(0, f"PCA{pca_dim}")
+    return ",".join(parts)
+
+def _min_train(index: faiss.Index, spec: str) -> int:
+    """Fewest training vectors to train the index well: enough per IVF list and PQ centroid, one per PCA output dimension"""
+    ivf = faiss.try_extract_index_ivf(index)
+    needed = ivf.nlist * MIN_POINTS_PER_CENTROID if ivf is not None else 0
+    if re.search(r"PQ\d", spec):
+        needed = max(needed, 256 * MIN_POINTS_PER_CENTROID)
+    pca = re.match(r"PCAR?(\d+)", spec)
+    if pca:
+        needed = max(needed, int(pca.group(1)))
+    return needed
+
+def build_index(vectors: np.ndarray, spec: str = "Flat", seed: int = 0) -> faiss.Index:
+    """
+    Builds an L2 index of the given index_factory type over vectors, training
+    it on a sample first when it needs training (IVF, PQ, SQ). A corpus too
+    small to train the requested type falls back to an exact Flat index.
+    """
+    spec = resolve_spec(spec, len(vectors))
+    index = faiss.index_factory(vectors.shape[1], spec, faiss.METRIC_L2)
+    min_train = _min_train(index, spec)
+    if len(vectors) < min_train:
+        print(f"[FAISS] {len(vectors)} vectors are too few to train {spec} (needs {min_train}), building Flat instead")
+        spec, index = "Flat", faiss.IndexFlatL2(vectors.shape[1])
+
+    t0 = time.time()
+    if not index.is_trained:
+        sample = np.random.default_rng(seed).choice(len(vectors), min(len(vectors), max(TRAIN_POINTS, min_train)), replace=False)
+        index.train(np.ascontiguousarray(vectors[np.sort(sample)], dtype=np.float32))
+    trained = time.time()
+    index.add(vectors)
+    print(f"[FAISS] Built {spec} over {len(vectors)} vectors (train {trained - t0:.1f}s, add {time.time() - trained:.1f}s)")
+    return index
+
+def tune_index(index: faiss.Index, nprobe: int, ef_search: int) -> faiss.Index:
+    """
+    Applies query-time parameters to whichever parts of the index use them
+    (nprobe for IVF, efSearch for HNSW), and gives IVF indexes the id -> list
+    map that reconstruct(), and so LangChain's MMR search, needs.
+    """
+    params = faiss.ParameterSpace()
+    # ParameterSpace reaches through pre-transforms and coarse quantizers, and rejects what an index lacks
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search), ("quantizer_efSearch", ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index
+
+def save_index(index: faiss.Index, path: str):
+    """Writes the index to a temp name renamed into place, so processes mapping the old file keep a valid copy"""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+def load_index(path: str) -> faiss.Index:
+    """
+    Opens an index memory-mapped and read-only, so loading reads nothing up
+    front and every process serving it shares the page cache. Flat codes (Flat,
+    HNSW, PQ, SQ storage) map with IO_FLAG_MMAP_IFC, IVF inverted lists with
+    IO_FLAG_MMAP; faiss rejects the combination for IVF, so that retries alone.
+    """
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
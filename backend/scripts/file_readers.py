@@ -1,18 +1,16 @@
 # Standard imports
-import threading
 import time
 from io import BytesIO, StringIO
 from pathlib import Path
-from PIL import Image
 
 # Third-party imports
 import docx2txt
 import fitz
 import pandas as pd
-import pytesseract
 from pptx import Presentation
 
-_pdf_lock = threading.Lock()
+# Local imports
+from .ocr import ocr_page
 
 def read_docx(f):
     if isinstance(f, Path):
@@ -41,31 +39,42 @@ def read_txt(f):
         return f.decode("utf-8", errors="ignore")
     return f.read().decode("utf-8", errors="ignore")
 
+def read_pdf_pages(doc, start: int = 0, end: int | None = None, ocr: bool = True) -> list[str | None]:
+    """
+    Extracts text for pages [start, end). Pages without a text layer are OCR'd
+    inline, or left as None when ocr=False so a separate OCR stage can take them.
+    """
+    end = doc.page_count if end is None else min(end, doc.page_count)
+    text_parts = []
+    for i in range(start, end):
+        text = doc[i].get_text()
+        if not text.strip():
+            text = ocr_page(doc[i]) if ocr else None
+        text_parts.append(text)
+    return text_parts
+
 def read_pdf(f):
     start_pdf = time.time()
     if hasattr(f, "seek"):
         f.seek(0)
-        
-    with _pdf_lock:
-        with fitz.open(stream=f.read(), filetype="pdf") as doc:
-            text_parts = []
-            for page in doc:
-                text = page.get_text()
-                if not text.strip():
-                    pix = page.get_pixmap(dpi=150)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    text = pytesseract.image_to_string(img)
-                if not text.strip():
-                    pix = page.get_pixmap(dpi=200)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    text = pytesseract.image_to_string(img)
-                text_parts.append(text)
-                
+
+    with fitz.open(stream=f.read(), filetype="pdf") as doc:
+        text_parts = read_pdf_pages(doc)
+
     if time.time() - start_pdf > 900:
         return None
-        
+
     return "\n".join(text_parts)
 
+def read_pdf_range(file: Path, start: int, end: int) -> tuple[list[str | None], int]:
+    """
+    Extracts pages [start, end) of a PDF on disk, so one large document can be
+    spread across worker processes. Returns per-page text, with None for pages
+    left to the OCR stage, and the total page count.
+    """
+    with fitz.open(str(file)) as doc:
+        return read_pdf_pages(doc, start, end, ocr=False), doc.page_count
+
 def read_csv(f):
     try:
         if isinstance(f, (bytes, bytearray)):
@@ -270,7 +270,9 @@ class TechnicalHandler():
             for i, doc in enumerate(docs, 1):
                 source = doc.metadata.get('source', 'Unknown')
                 content_preview = doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
-                yield f"{i}. **{source}**\n{content_preview}\n\n"
+                aliases = doc.metadata.get('aliases', [])
+                also = f" (+{len(aliases)} identical copies)" if aliases else ""
+                yield f"{i}. **{source}**{also}\n{content_preview}\n\n"
                 
         except Exception as e:
             yield f"Context retrieval error: {str(e)}\n"
\ No newline at end of file
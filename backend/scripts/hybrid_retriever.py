@@ -1,18 +1,119 @@
 # Standard library imports
+import threading
 import time
 import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Third-party imports
-from langchain_community.retrievers import BM25Retriever
+from langchain_community.vectorstores.faiss import FAISS
 from langchain_core.documents import Document
 
 # Local imports
+from . import config, embedding_backend
 from .config import templates
+from .lru_cache import LRUCache
+from .sparse_bm25 import SparseBM25
 
-class HybridRetriever:
-    def __init__(self, bm25: BM25Retriever, faiss_retriever):
+class Shard:
+    """The BM25 and FAISS indexes over one DOCUMENTS folder's chunks"""
+    MMR_K = 6
+
+    def __init__(self, name: str, bm25: SparseBM25, faiss: FAISS):
+        self.name = name
         self.bm25 = bm25
-        self.faiss_retriever = faiss_retriever
+        self.faiss = faiss
+
+    def dense_search(self, embedding: list[float]) -> list[Document]:
+        return self.faiss.max_marginal_relevance_search_by_vector(embedding, k=self.MMR_K)
+
+class LegStats:
+    """Latency of each retrieval leg across queries: outcomes and percentiles over the last WINDOW queries"""
+    WINDOW = 1000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.legs: dict[str, dict] = {}
+
+    def record(self, leg: str, ms: float | None, outcome: str = "ok"):
+        with self.lock:
+            stats = self.legs.setdefault(leg, {"ok": 0, "timeout": 0, "error": 0, "shed": 0, "recent": deque(maxlen=self.WINDOW)})
+            stats[outcome] += 1
+            if ms is not None:
+                stats["recent"].append(ms)
+
+    def summary(self) -> dict[str, dict]:
+        with self.lock:
+            summary = {}
+            for leg, stats in self.legs.items():
+                recent = sorted(stats["recent"])
+                summary[leg] = {key: stats[key] for key in ("ok", "timeout", "error", "shed")}
+                if recent:
+                    summary[leg].update(
+                        p50_ms=round(recent[len(recent) // 2], 1),
+                        p95_ms=round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 1),
+                        mean_ms=round(sum(recent) / len(recent), 1),
+                    )
+            return summary
+
+class LegPool:
+    """
+    A retrieval leg's threads. Searches that missed their budget are cancelled
+    if still queued; the running ones are counted until they finish, and with
+    max_late of them the leg is saturated and new queries skip it.
+    """
+    def __init__(self, name: str, workers: int, max_late: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"retrieval-{name}")
+        self.max_late = max_late
+        self.late = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        return self.executor.submit(fn, *args)
+
+    def saturated(self) -> bool:
+        return self.late >= self.max_late
+
+    def abandon(self, futures):
+        for future in futures:
+            if future.cancel():
+                continue
+            with self.lock:
+                self.late += 1
+            future.add_done_callback(self._late_finished)
+
+    def _late_finished(self, future):
+        with self.lock:
+            self.late -= 1
+
+class HybridRetriever:
+    RRF_K = 60
+    # One pool per leg (the query embedding runs in dense's), shared by every retriever and index
+    # version, so swapping versions starts no threads and one leg's stragglers never hold the other's
+    # workers. Each keeps half its threads for queries that can still answer in time.
+    _pools = {leg: LegPool(leg, workers=16, max_late=8) for leg in ("bm25", "dense")}
+    # Per-leg latency since startup, kept across index reloads
+    stats = LegStats()
+    # retrieve_context results of every retriever; keyed by index version, so a rebuilt index never serves stale ones
+    results = LRUCache(
+        config.RESULT_CACHE_SIZE,
+        ttl=config.RESULT_CACHE_TTL or None,
+        sizeof=lambda docs: sum(len(doc.page_content) + len(str(doc.metadata)) for doc in docs),
+    )
+
+    def __init__(self, shards: list[Shard], version: str | None = None):
+        self.shards = {shard.name: shard for shard in shards}
+        # Index version (versions{tag}/<version>) the shards were loaded from; None disables result caching
+        self.version = version
+
+    def subset(self, names: list[str] | None) -> "HybridRetriever":
+        """A retriever over only the named shards (all of them when names is empty)"""
+        if not names:
+            return self
+        unknown = [name for name in names if name not in self.shards]
+        if unknown:
+            raise KeyError(f"Unknown shards {unknown}; available: {sorted(self.shards)}")
+        return HybridRetriever([self.shards[name] for name in dict.fromkeys(names)], self.version)
 
     @staticmethod
     def query_reform(query: str, prompt) -> str:
@@ -29,13 +130,23 @@ class HybridRetriever:
     
     def retrieve_context(self, query: str, max_results: int = 5) -> list[Document]:
         """
-        Retrieves content by invoking retrievers in Hybrid Retriever
+        Retrieves content by invoking retrievers in Hybrid Retriever. Results
+        are cached per (index version, shards, normalized query, max_results),
+        unless a leg was late or failed.
         """
+        key = None
+        if self.version:
+            key = (self.version, tuple(sorted(self.shards)), embedding_backend.normalize_query(query), max_results)
+            cached = self.results.get(key)
+            if cached is not None:
+                print(f"[Retrieval] Served {len(cached)} cached results")
+                return list(cached)
+
         seen_content = set()
         docs = []
         try:
             # Parallelize each retriever in the ensemble
-            results = self.get_relevant_documents(query)
+            results, complete = self._search(query)
             for doc in results:
                 content = doc.page_content
                 if not self._filter_chunk(content):
@@ -43,6 +154,9 @@ class HybridRetriever:
                 if content not in seen_content:
                     seen_content.add(content)
                     docs.append(doc)
+            # Partial results from a late or failed leg are not worth repeating
+            if key and complete:
+                self.results.put(key, docs[:max_results])
 
         except Exception as e:
             print(f"[Retrieval] Query failed: {e}")
@@ -50,17 +164,107 @@ class HybridRetriever:
 
         return docs[:max_results]
     
+    @staticmethod
+    def _finished(fn, *args) -> tuple:
+        """Runs fn, returning its result and when it finished"""
+        result = fn(*args)
+        return result, time.perf_counter()
+
+    def _collect(self, leg: str, pool: LegPool, futures: dict, deadline: float | None, t0: float) -> tuple[dict, float | None]:
+        """
+        Waits for one leg's futures until its deadline. Returns each shard's
+        results and the leg's latency (None if any shard was late). Late or
+        failed shards are left out; a late future is cancelled if it hasn't
+        started, else runs on in the background with nothing waiting for it.
+        """
+        done, late = wait(futures, timeout=None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        results, finished = {}, []
+        for future in done:
+            try:
+                results[futures[future]], end = future.result()
+                finished.append(end)
+            except Exception as e:
+                print(f"[Retrieval] {leg} failed on shard {futures[future]}: {e}")
+        if late:
+            pool.abandon(late)
+            print(f"[Retrieval] {leg} missed its budget on {len(late)} of {len(futures)} shards")
+        outcome = "timeout" if late else "error" if len(results) < len(futures) else "ok"
+        ms = (max(finished) - t0) * 1000 if finished and not late else None
+        self.stats.record(leg, ms, outcome)
+        return results, ms
+
+    def _admit(self, leg: str, pool: LegPool) -> bool:
+        """Whether to run a leg: not while its pool is saturated with earlier queries' late searches"""
+        if not pool.saturated():
+            return True
+        print(f"[Retrieval] Skipping {leg}: {pool.late} earlier searches are still running past their budget")
+        self.stats.record(leg, None, "shed")
+        return False
+
     def get_relevant_documents(self, query: str, k: int = 12) -> list[Document]:
-        bm25_docs = self.bm25.invoke(query)
-        faiss_docs = self.faiss_retriever.invoke(query)
-
-        # Deduplicate results by content
-        seen, merged = set(), []
-        for doc in bm25_docs + faiss_docs:
-            if doc.page_content not in seen:
-                seen.add(doc.page_content)
-                merged.append(doc)
-        return merged[:k]
+        return self._search(query, k)[0]
+
+    def _search(self, query: str, k: int = 12) -> tuple[list[Document], bool]:
+        """
+        Runs BM25 and dense search concurrently on every shard, each leg within
+        its budget (bm25_budget_ms / dense_budget_ms, from when the query
+        starts). Whatever a leg returns in time is used, so one slow or failing
+        leg costs its results, not the query, and a leg whose pool is busy with
+        earlier late searches is skipped. The query is embedded once, for all
+        shards, as part of the dense leg. Returns the fused results and whether
+        every leg answered on every shard.
+        """
+        shards = list(self.shards.values())
+        if not shards:
+            return [], True
+        t0 = time.perf_counter()
+        bm25_deadline = t0 + config.BM25_BUDGET_MS / 1000 if config.BM25_BUDGET_MS > 0 else None
+        dense_deadline = t0 + config.DENSE_BUDGET_MS / 1000 if config.DENSE_BUDGET_MS > 0 else None
+
+        bm25_pool, dense_pool = self._pools["bm25"], self._pools["dense"]
+        bm25_futures, dense_futures, embed_ms = {}, {}, None
+        if self._admit("bm25", bm25_pool):
+            bm25_futures = {bm25_pool.submit(self._finished, shard.bm25.invoke, query): shard.name for shard in shards}
+        if self._admit("dense", dense_pool):
+            embedding_future = dense_pool.submit(self._finished, embedding_backend.embed_query, shards[0].faiss.embedding_function, query)
+            # Shards share the embedding model, so one embedding serves them all
+            embedded, embed_ms = self._collect("embed", dense_pool, {embedding_future: "all"}, dense_deadline, t0)
+            if embedded:
+                dense_futures = {dense_pool.submit(self._finished, shard.dense_search, embedded["all"]): shard.name for shard in shards}
+            else:
+                failed = embedding_future.done() and not embedding_future.cancelled()
+                self.stats.record("dense", None, "error" if failed else "timeout")
+
+        legs = [("bm25", bm25_pool, bm25_futures, bm25_deadline), ("dense", dense_pool, dense_futures, dense_deadline)]
+        # Sooner deadline first, so waiting on one leg never eats into the other's budget
+        legs.sort(key=lambda leg: float("inf") if leg[3] is None else leg[3])
+        found, took = {}, {}
+        for leg, pool, futures, deadline in legs:
+            found[leg], took[leg] = self._collect(leg, pool, futures, deadline, t0) if futures else ({}, None)
+        took["embed"] = embed_ms
+        print("[Retrieval] " + ", ".join(f"{leg} {'late/failed' if took[leg] is None else f'{took[leg]:.0f}ms'}" for leg in ("bm25", "embed", "dense"))
+              + f" over {len(shards)} shards; {(time.perf_counter() - t0) * 1000:.0f}ms total")
+
+        # Each shard's BM25 hits, then its dense hits, deduplicated by content and tagged with the
+        # shard whose chunk numbers they carry
+        ranked = []
+        for shard in shards:
+            seen, merged = set(), []
+            for doc in found["bm25"].get(shard.name, []) + found["dense"].get(shard.name, []):
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    doc.metadata["shard"] = shard.name
+                    merged.append(doc)
+            ranked.append(merged)
+
+        # Reciprocal rank fusion: BM25 scores don't compare across shards (each has its own idf), ranks do
+        scores, docs = {}, {}
+        for results in ranked:
+            for rank, doc in enumerate(results):
+                scores[doc.page_content] = scores.get(doc.page_content, 0.0) + 1.0 / (self.RRF_K + rank)
+                docs.setdefault(doc.page_content, doc)
+        complete = all(len(found[leg]) == len(shards) for leg in found)
+        return [docs[content] for content in sorted(scores, key=scores.get, reverse=True)[:k]], complete
 
     @staticmethod
     def _filter_chunk(doc: str) -> bool:
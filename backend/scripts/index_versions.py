@@ -0,0 +1,123 @@
+# Standard library imports
+import os
+import shutil
+import socket
+import time
+from pathlib import Path
+
+# Library specific imports
+import psutil
+
+# Local imports
+from .load_utils import INDEX_DIR
+from .manifest import load_json, save_json
+
+class IndexVersions:
+    """
+    Every build of an index gets its own directory, indexes/versions{tag}/<version>/,
+    named by build time and holding both indexes, the chunk dict they were built
+    from and a manifest.json. A build is written to <version>.partial, which names
+    the building process in an OWNER file, and renamed into place once complete. CURRENT names the version the backend serves and is
+    replaced atomically, so a reader always sees a complete version.
+    """
+    MANIFEST = "manifest.json"
+    POINTER = "CURRENT"
+    PARTIAL = ".partial"
+    OWNER = "OWNER"
+    # A partial this young without an OWNER file may be one another build is about to claim
+    UNOWNED_GRACE_SECONDS = 60
+
+    def __init__(self, tag: str = "", root: str | Path = INDEX_DIR, keep: int = 3):
+        self.root = Path(root) / f"versions{tag}"
+        self.keep = keep
+
+    def path(self, version: str) -> Path:
+        # Versions arrive from the reload endpoint; never let one name a path outside root
+        if not version or Path(version).name != version or version.startswith("."):
+            raise ValueError(f"Invalid index version {version!r}")
+        return self.root / version
+
+    def available(self) -> list[str]:
+        """Complete versions, oldest first"""
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / self.MANIFEST).exists())
+
+    def current(self) -> str | None:
+        """The version CURRENT points to, if it is complete"""
+        pointer = self.root / self.POINTER
+        if not pointer.exists():
+            return None
+        version = pointer.read_text(encoding="utf-8").strip()
+        return version if (self.path(version) / self.MANIFEST).exists() else None
+
+    def manifest(self, version: str) -> dict:
+        manifest = load_json(self.path(version) / self.MANIFEST, {})
+        if not manifest:
+            raise FileNotFoundError(f"No complete index version {version!r} in {self.root}")
+        return manifest
+
+    def stage(self) -> tuple[str, Path]:
+        """A new version name and the empty directory to build it in"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        for stale in filter(self._abandoned, self.root.glob(f"*{self.PARTIAL}")):
+            print(f"[INDEX] Removing {self.root.name}/{stale.name}, left behind by an interrupted build")
+            shutil.rmtree(stale, ignore_errors=True)
+        version = time.strftime("%Y%m%d-%H%M%S")
+        suffix = 1
+        while self.path(version).exists():
+            suffix += 1
+            version = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+        staging = self.root / (version + self.PARTIAL)
+        staging.mkdir()
+        (staging / self.OWNER).write_text(f"{socket.gethostname()} {os.getpid()}", encoding="utf-8")
+        return version, staging
+
+    def _abandoned(self, staging: Path) -> bool:
+        """Whether a partial build's process is gone; one building on another host is left alone"""
+        try:
+            host, pid = (staging / self.OWNER).read_text(encoding="utf-8").rsplit(" ", 1)
+            pid = int(pid)
+        except FileNotFoundError:
+            try:
+                return time.time() - staging.stat().st_mtime > self.UNOWNED_GRACE_SECONDS
+            except FileNotFoundError:
+                return False  # Published or removed meanwhile
+        except (OSError, ValueError):
+            return True
+        return host == socket.gethostname() and not psutil.pid_exists(pid)
+
+    def publish(self, version: str, manifest: dict, activate: bool = True) -> Path:
+        """Writes the manifest, moves the staged build into place and, by default, makes it current"""
+        staging = self.root / (version + self.PARTIAL)
+        (staging / self.OWNER).unlink(missing_ok=True)
+        manifest = {**manifest, "version": version, "files": {
+            p.name: p.stat().st_size for p in sorted(staging.iterdir()) if p.is_file()
+        }}
+        save_json(staging / self.MANIFEST, manifest, indent=2)
+        os.replace(staging, self.path(version))
+        if activate:
+            self.activate(version)
+        self.prune()
+        return self.path(version)
+
+    def activate(self, version: str):
+        """Points CURRENT at a complete version, e.g. to roll back"""
+        self.manifest(version)
+        pointer = self.root / self.POINTER
+        tmp_path = pointer.with_name(pointer.name + ".tmp")
+        tmp_path.write_text(version, encoding="utf-8")
+        os.replace(tmp_path, pointer)
+        print(f"[INDEX] {self.root.name}/{version} is now current")
+
+    def prune(self):
+        """Removes all but the newest `keep` versions (0 keeps every one), never the current one"""
+        current = self.current()
+        old = self.available()[:-self.keep] if self.keep > 0 else []
+        for version in (v for v in old if v != current):
+            try:
+                shutil.rmtree(self.path(version))
+                print(f"[INDEX] Removed old version {self.root.name}/{version}")
+            except OSError as e:
+                # A backend that still maps it holds the files open on Windows; retried after the next build
+                print(f"[WARN] Could not remove {self.root.name}/{version}: {e}")
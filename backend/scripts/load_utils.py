@@ -1,7 +1,10 @@
 # Standard library imports
 import os
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+from typing import Iterator
 
 def get_cache_dir() -> tuple[Path, Path, Path, Path]:
     """
@@ -49,4 +52,60 @@ class DocumentLoader:
                 if any(kw in name.lower() for kw in ignore_keywords):
                     continue
                 file_paths.append(root_path / name)
-        return file_paths
\ No newline at end of file
+        return file_paths
+
+    def _is_ignored_dir(self, path: str, ignore_folders: set[str], ignore_keywords: set[str]) -> bool:
+        name = os.path.basename(path).lower()
+        return any(path.lower().startswith(f) for f in ignore_folders) or any(kw in name for kw in ignore_keywords)
+
+    def _scan_dir(self, path: str, ignore_keywords: set[str]) -> tuple[list[Path], list[str]]:
+        """Lists one directory, returning (files, subdirectories). Unreadable directories are skipped like os.walk does."""
+        files, dirs = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # Like os.walk, symlinked directories are listed but not followed
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                dirs.append(entry.path)
+                            continue
+                    except OSError:
+                        continue
+                    if not any(kw in entry.name.lower() for kw in ignore_keywords):
+                        files.append(Path(entry.path))
+        except OSError as e:
+            print(f"[WARN] Could not scan {path}: {e}")
+        return files, dirs
+
+    def iter_supported_files(self, folder_paths: list[str], max_workers: int = 16) -> Iterator[Path]:
+        """
+        Walks every folder concurrently with os.scandir, one directory listing per
+        task, and yields file paths as soon as their directory has been read.
+        Applies the same IGNORE_FOLDERS / IGNORE_KEYWORDS rules as gather_supported_files.
+        """
+        ignore_folders = {str(Path(f)).lower() for f in self._IGNORE_FOLDERS}
+        ignore_keywords = {kw.lower() for kw in self._IGNORE_KEYWORDS}
+        start = time.perf_counter()
+        folders = file_count = 0
+
+        # Directory listings on network shares are latency bound, so threads keep many in flight
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for folder in folder_paths:
+                root = str(Path(folder))
+                if not any(root.lower().startswith(f) for f in ignore_folders):
+                    pending.add(executor.submit(self._scan_dir, root, ignore_keywords))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, dirs = future.result()
+                    folders += 1
+                    for d in dirs:
+                        if not self._is_ignored_dir(d, ignore_folders, ignore_keywords):
+                            pending.add(executor.submit(self._scan_dir, d, ignore_keywords))
+                    file_count += len(files)
+                    yield from files
+
+        elapsed = time.perf_counter() - start
+        print(f"[DISCOVERY] {file_count} files in {folders} folders in {elapsed:.1f}s ({file_count / max(elapsed, 1e-9):.0f} files/s)")
@@ -0,0 +1,78 @@
+# Standard library imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe cache of at most maxsize entries, evicting the least recently
+    used. With ttl (seconds), entries older than that are dropped on lookup.
+    Counts hits and misses, and with sizeof, the approximate bytes held;
+    maxsize 0 disables it (every get misses).
+    """
+    def __init__(self, maxsize: int, ttl: float | None = None, sizeof: Callable[[object], int] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()  # key -> (value, stored at, bytes)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bytes = 0
+
+    def get(self, key: Hashable, default=None):
+        with self.lock:
+            entry = self.entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                self.expired += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        size = self.sizeof(value) if self.sizeof else 0
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, time.monotonic(), size)
+            self.bytes += size
+            while len(self.entries) > self.maxsize:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: Hashable):
+        self.bytes -= self.entries.pop(key)[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
+            if self.ttl:
+                stats.update(ttl_s=self.ttl, expired=self.expired)
+            if self.sizeof:
+                stats["bytes"] = self.bytes
+            return stats
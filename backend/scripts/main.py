@@ -26,10 +26,12 @@ from exchangelib import Credentials, Account, Configuration as ExchangeConfig, D
 
 # Local imports
 from .rag import RAGPipeline, Message
-from .config import ModelConfig
+from .config import ModelConfig, BM25_BUDGET_MS, DENSE_BUDGET_MS
+from .embedding_backend import QUERY_CACHE
+from .hybrid_retriever import HybridRetriever
 from .llm_utils import get_llm_engine
 from .file_readers import FileReader
-from .utils import LoginData, QueryInput, Configuration, UploadedDocument
+from .utils import LoginData, QueryInput, Configuration, UploadedDocument, IndexReload
 
 # Open and read config
 with open("config.yaml", "r") as f:
@@ -90,6 +92,13 @@ def create_jwt_token(user_id: str) -> str:
 pipeline._get_retrievers()
 get_llm_engine()._load_model(ModelConfig.MODEL)
 
+# `kill -HUP <pid>` after a build swaps in the new index version, like POST /reload-index
+if hasattr(signal, "SIGHUP"):
+    try:
+        signal.signal(signal.SIGHUP, lambda signum, frame: pipeline.reload_in_background())
+    except ValueError:
+        print("[INDEX] Not in the main thread; SIGHUP reload disabled, use POST /reload-index")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config.get("allowed_origins", ["*"]),
@@ -189,6 +198,27 @@ async def set_config(config: Configuration):
     get_llm_engine().set_model(config.model)
     return {"message": "Config updated", "config": CURRENT_CONFIG}
 
+@app.post("/reload-index")
+async def reload_index(reload: IndexReload | None = None):
+    """Loads the current (or a given) index version in the background and swaps it in"""
+    version = reload.version if reload else None
+    if not pipeline.reload_in_background(version):
+        raise HTTPException(status_code=409, detail="An index reload is already running")
+    return JSONResponse(status_code=202, content={"message": "Reload started", "version": version, "serving": pipeline.index_version})
+
+@app.get("/index-version")
+async def index_version():
+    return pipeline.index_status()
+
+@app.get("/retrieval-stats")
+async def retrieval_stats():
+    return {
+        "legs": HybridRetriever.stats.summary(),
+        "budgets_ms": {"bm25": BM25_BUDGET_MS, "dense": DENSE_BUDGET_MS},
+        "query_embeddings": QUERY_CACHE.stats(),
+        "results": HybridRetriever.results.stats(),
+    }
+
 @app.get("/models")
 async def list_models():
     engine = get_llm_engine()
@@ -208,6 +238,12 @@ async def stream_query(
     else:
         username = "guest"
     
+    if input.shards:
+        try:
+            pipeline._get_retrievers()[0].subset(input.shards)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=e.args[0])
+
     chat_id = input.chat_id or str(uuid.uuid4())
     assistant_reply = ""
 
@@ -217,7 +253,8 @@ async def stream_query(
             input.query,
             input.history,
             input.use_web_search,
-            chat_id=chat_id
+            chat_id=chat_id,
+            shards=input.shards
         )
 
         # --- Timeout watchdog ---
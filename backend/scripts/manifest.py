@@ -0,0 +1,137 @@
+# Standard library imports
+import collections
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Local imports
+from .load_utils import CACHE_DIR
+
+MANIFEST_PATH = CACHE_DIR / "ingest_manifest.json"
+
+def file_digest(path, block_size: int = 1 << 20) -> str:
+    """sha256 of a file's contents, read in blocks so large PDFs aren't held in memory"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def load_json(path: Path, default):
+    """Loads a JSON cache file, falling back to default if it is missing or unreadable"""
+    if not path.exists():
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, type(default)):
+            raise ValueError(f"Expected {type(default).__name__}, got {type(data).__name__}")
+        return data
+    except Exception as e:
+        print(f"[WARN] Could not read {path.name}, starting fresh: {e}")
+        return default
+
+def save_json(path: Path, data, **kwargs):
+    """Writes JSON to a temp file and renames it over the target, so a crash never leaves a half-written cache"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+class IngestManifest:
+    """
+    Persistent record of every parsed source file, keyed by normalized path.
+    Each entry holds size, mtime and a content hash. Files whose size and mtime
+    are unchanged are trusted without re-hashing.
+    """
+    def __init__(self, path: Path = MANIFEST_PATH):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = load_json(self.path, {})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def digest(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        return entry["sha256"] if entry else None
+
+    def check(self, path: Path) -> tuple[bool, dict]:
+        """
+        Returns (changed, entry) for a file on disk. changed is False when the
+        file matches its manifest entry by size and mtime, or by content hash.
+        """
+        key = os.path.normpath(str(path))
+        stat = os.stat(path)
+        old = self.entries.get(key)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime_ns:
+            return False, old
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": file_digest(path)}
+        if old and old["sha256"] == entry["sha256"]:
+            # Touched but not modified: keep any quarantine status
+            return False, {**old, **entry}
+        return True, entry
+
+    def scan(self, paths: Iterable[Path], seen: set[str], max_workers: int = 16) -> Iterator[tuple[Path, dict]]:
+        """
+        Streams the files that need a (re)parse with their new entries, checking
+        paths as they arrive. Unchanged files have their entries refreshed in
+        place, and the key of every file found is added to seen.
+        """
+        def check(path):
+            try:
+                return path, *self.check(path)
+            except OSError as e:
+                print(f"[WARN] Could not stat {path}: {e}")
+                return path, None, None
+
+        def collect(future):
+            path, is_changed, entry = future.result()
+            if entry is None:
+                return None
+            key = os.path.normpath(str(path))
+            seen.add(key)
+            if is_changed:
+                return path, entry
+            self.entries[key] = entry
+            return None
+
+        # Hashing is I/O bound and hashlib releases the GIL, so threads overlap reads on network shares.
+        # Only a bounded window is in flight, so results flow out while paths are still being discovered.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            window = collections.deque()
+            for path in paths:
+                window.append(executor.submit(check, path))
+                if len(window) >= max_workers * 4 and (result := collect(window.popleft())):
+                    yield result
+            while window:
+                if result := collect(window.popleft()):
+                    yield result
+
+    def missing(self, seen: set[str]) -> list[str]:
+        """Keys of manifest entries that were not found on disk"""
+        return [key for key in self.entries if key not in seen]
+
+    def record(self, path, entry: dict):
+        self.entries[os.path.normpath(str(path))] = entry
+
+    def quarantine(self, path, entry: dict, reason: str):
+        """Records a file that failed to parse. It is skipped until its contents change."""
+        self.record(path, {**entry, "quarantined": reason, "quarantined_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def quarantined(self) -> dict[str, str]:
+        """Returns path -> reason for every quarantined file"""
+        return {key: entry["quarantined"] for key, entry in self.entries.items() if "quarantined" in entry}
+
+    def forget(self, key: str):
+        self.entries.pop(key, None)
+
+    def save(self):
+        save_json(self.path, self.entries)
@@ -0,0 +1,103 @@
+# Standard library imports
+import re
+from collections import defaultdict
+
+# Library specific imports
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from langchain_core.documents import Document
+
+_WORD_RE = re.compile(r"\w+")
+
+class NearDuplicateCollapser:
+    """
+    Collapses near-duplicate chunks (revisions of one document that differ by a
+    few characters) with MinHash + LSH. Each chunk is reduced to a signature of
+    NUM_PERM minimum hashes over its character shingles; chunks that share a band
+    of the signature are candidates, and a candidate whose estimated Jaccard
+    similarity to a kept chunk is at least threshold is folded into it.
+    Kept chunks record how many chunks they absorbed under metadata["near_duplicates"]
+    and the other sources those came from under metadata["near_duplicate_sources"].
+    """
+    NUM_PERM = 128
+    BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a band
+    SHINGLE_SIZE = 5
+
+    def __init__(self, threshold: float = 0.85, seed: int = 1):
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = np.uint64(rng.integers(0, 1 << 62) * 2 + 1)  # odd multiplier
+        self._b = np.uint64(rng.integers(0, 1 << 62))
+        self._rows = self.NUM_PERM // self.BANDS
+        self._bin_bits = np.uint64(self.NUM_PERM.bit_length() - 1)
+        self._place_values = np.uint64(256) ** np.arange(self.SHINGLE_SIZE - 1, -1, -1, dtype=np.uint64)
+        self._bins = np.arange(self.NUM_PERM)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        One-permutation MinHash: every shingle is hashed once and falls into one of
+        NUM_PERM bins by its top bits; the signature is the minimum per bin. Empty
+        bins (short chunks) borrow from the next non-empty bin, offset by the distance,
+        so they still compare like independent minimums.
+        """
+        # Character shingles: an edited character disturbs only SHINGLE_SIZE of them, not whole words
+        data = np.frombuffer(" ".join(_WORD_RE.findall(text.lower())).encode(), dtype=np.uint8)
+        if len(data) < self.SHINGLE_SIZE:
+            data = np.pad(data, (0, self.SHINGLE_SIZE - len(data)))
+        # Each shingle packed into one integer (5 bytes fit in 40 bits), then multiply-shift hashed
+        shingles = sliding_window_view(data, self.SHINGLE_SIZE).astype(np.uint64) @ self._place_values
+        hashes = self._a * shingles + self._b
+        bins = (hashes >> (np.uint64(64) - self._bin_bits)).astype(np.intp)
+        values = hashes & np.uint64((1 << 56) - 1)
+
+        signature = np.full(self.NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+        np.minimum.at(signature, bins, values)
+        filled = np.flatnonzero(signature != np.iinfo(np.uint64).max)
+        if len(filled) < self.NUM_PERM:
+            nearest = filled[np.searchsorted(filled, self._bins) % len(filled)]
+            distance = ((nearest - self._bins) % self.NUM_PERM).astype(np.uint64)
+            signature = signature[nearest] + (distance << np.uint64(56))
+        return signature
+
+    def collapse(self, docs: list[Document]) -> list[Document]:
+        """
+        Returns the chunks to index, in their original order. The first chunk of
+        each near-duplicate cluster is kept; metadata of the input docs is not modified.
+        """
+        buckets: dict[tuple[int, bytes], list[int]] = defaultdict(list)
+        signatures: list[np.ndarray] = []
+        kept: list[Document] = []
+        absorbed: dict[int, list[Document]] = defaultdict(list)  # position in kept -> folded chunks
+
+        for doc in docs:
+            sig = self.signature(doc.page_content)
+            bands = [(band, sig[band * self._rows:(band + 1) * self._rows].tobytes()) for band in range(self.BANDS)]
+
+            match = None
+            candidates = {k for key in bands for k in buckets.get(key, ())}
+            # Lowest position first, so a chunk joins the earliest cluster it matches
+            for k in sorted(candidates):
+                if np.mean(signatures[k] == sig) >= self.threshold:
+                    match = k
+                    break
+            if match is not None:
+                absorbed[match].append(doc)
+                continue
+
+            # Only kept chunks are bucketed, so clusters can't chain through their members
+            for key in bands:
+                buckets[key].append(len(kept))
+            signatures.append(sig)
+            kept.append(doc)
+
+        collapsed = []
+        for k, doc in enumerate(kept):
+            if k not in absorbed:
+                collapsed.append(doc)
+                continue
+            others = sorted({d.metadata.get("source", "") for d in absorbed[k]} - {doc.metadata.get("source", "")})
+            metadata = {**doc.metadata, "near_duplicates": len(absorbed[k])}
+            if others:
+                metadata["near_duplicate_sources"] = others
+            collapsed.append(Document(page_content=doc.page_content, metadata=metadata))
+        return collapsed
@@ -0,0 +1,94 @@
+# Standard library imports
+import hashlib
+import sqlite3
+from pathlib import Path
+
+# Third-party imports
+import fitz
+import pytesseract
+from PIL import Image
+
+# Local imports
+from .load_utils import CACHE_DIR
+
+OCR_CACHE_PATH = CACHE_DIR / "ocr_cache.sqlite"
+MIN_DPI, DEFAULT_DPI, MAX_DPI = 150, 200, 300
+
+class OcrCache:
+    """OCR text keyed by the sha256 of the rendered page image, so a re-parse or duplicate scan never re-runs tesseract"""
+    def __init__(self, path: Path = OCR_CACHE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Several OCR workers share the file; the timeout waits out another process's write
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT)")
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT text FROM ocr WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, text: str):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO ocr (key, text) VALUES (?, ?)", (key, text))
+
+    def close(self):
+        self._conn.close()
+
+_worker_cache = None
+
+def _get_cache() -> OcrCache:
+    # One connection per process, opened on first use
+    global _worker_cache
+    if _worker_cache is None:
+        _worker_cache = OcrCache()
+    return _worker_cache
+
+def is_blank_page(page) -> bool:
+    """A page with no text, images or vector drawings has nothing to OCR; checked without rendering"""
+    return not page.get_images() and not page.get_drawings()
+
+def ocr_dpi(page) -> int:
+    """Renders near the native resolution of the page's largest scanned image, clamped to [MIN_DPI, MAX_DPI]"""
+    native = 0
+    for info in page.get_image_info():
+        width = fitz.Rect(info["bbox"]).width
+        if width > 0:
+            native = max(native, info["width"] * 72 / width)
+    if not native:
+        return DEFAULT_DPI
+    return int(min(max(native, MIN_DPI), MAX_DPI))
+
+def _ocr_at(page, dpi: int, cache: OcrCache) -> str:
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    key = hashlib.sha256(f"{pix.width}x{pix.height}:".encode() + pix.samples).hexdigest()
+    text = cache.get(key)
+    if text is None:
+        img = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+        text = pytesseract.image_to_string(img)
+        cache.put(key, text)
+    return text
+
+def ocr_page(page, cache: OcrCache | None = None) -> str:
+    """
+    OCRs a page with no text layer. Blank pages are skipped, the first pass
+    renders at the page's native image resolution, and an empty result is
+    retried once at MAX_DPI.
+    """
+    if is_blank_page(page):
+        return ""
+    cache = cache or _get_cache()
+    dpi = ocr_dpi(page)
+    text = _ocr_at(page, dpi, cache)
+    if not text.strip() and dpi < MAX_DPI:
+        text = _ocr_at(page, MAX_DPI, cache)
+    return text
+
+def ocr_pdf_page(file: Path, page_number: int) -> str:
+    """OCR stage entry point: opens the PDF in the OCR worker and OCRs one page"""
+    try:
+        with fitz.open(str(file)) as doc:
+            return ocr_page(doc[page_number])
+    except Exception as e:
+        # Some pytesseract errors can't be unpickled, which would break the whole pool
+        raise RuntimeError(f"OCR failed on page {page_number}: {e}") from None
@@ -0,0 +1,98 @@
+# Standard library imports
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+
+# Local imports
+from .load_utils import CACHE_DIR
+
+PARSE_CACHE_PATH = CACHE_DIR / "parsed_text_docs.sqlite"
+LEGACY_PARSE_CACHE_PATH = CACHE_DIR / "parsed_text_docs.json"
+
+class ParseCache:
+    """
+    Per-document store of parsed text, one row per source file.
+    Backed by SQLite in WAL mode: the primary key is the offset index, writes
+    are per-document transactions, so a crash mid-build loses at most the
+    document being written and never corrupts the others. Readers stream rows
+    or fetch a single path without decoding the rest of the cache.
+    """
+    def __init__(self, path: Path = PARSE_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, sha256 TEXT, text TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256)")
+        self._conn.commit()
+        if not len(self) and LEGACY_PARSE_CACHE_PATH.exists():
+            self._migrate_legacy(LEGACY_PARSE_CACHE_PATH)
+
+    def _migrate_legacy(self, legacy_path: Path):
+        """Imports the old monolithic parsed_text_docs.json once, then sets it aside"""
+        print(f"[CACHE] Migrating {legacy_path.name} into {self.path.name}")
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (path, sha256, text) VALUES (?, NULL, ?)",
+                    ((os.path.normpath(filename), text) for text, filename in records if filename),
+                )
+            os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".migrated"))
+        except Exception as e:
+            print(f"[WARN] Failed to migrate legacy parse cache: {e}")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __contains__(self, path: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM documents WHERE path = ?", (path,)).fetchone() is not None
+
+    def paths(self) -> dict[str, str | None]:
+        """Returns path -> sha256 for every cached document, without reading any text"""
+        return dict(self._conn.execute("SELECT path, sha256 FROM documents"))
+
+    def get(self, path: str) -> str | None:
+        row = self._conn.execute("SELECT text FROM documents WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, path: str, text: str | None, sha256: str | None = None):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (path, sha256, text) VALUES (?, ?, ?)",
+                (path, sha256, text),
+            )
+
+    def copy(self, path: str, sha256: str) -> bool:
+        """Stores the text already cached for identical content under another path. Returns False if there is none."""
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR REPLACE INTO documents (path, sha256, text) "
+                "SELECT ?, sha256, text FROM documents WHERE sha256 = ? LIMIT 1",
+                (path, sha256),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, paths: list[str]):
+        with self._conn:
+            self._conn.executemany("DELETE FROM documents WHERE path = ?", ((p,) for p in paths))
+
+    def iter_documents(self, paths: list[str] | None = None) -> Iterator[tuple[str, str]]:
+        """Streams (text, path) records, optionally restricted to the given paths"""
+        if paths is None:
+            # A separate cursor keeps the scan lazy while other statements run
+            yield from self._conn.cursor().execute("SELECT text, path FROM documents ORDER BY path")
+            return
+        for path in paths:
+            row = self._conn.execute("SELECT text FROM documents WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                yield row[0], path
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,175 @@
+# Standard library imports
+import os
+import queue
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Local imports
+from .file_readers import FileReader, read_pdf_range
+from .ocr import ocr_pdf_page
+from .worker_pool import WorkerPool
+
+_DONE = object()
+
+class ParseTimeout(Exception):
+    pass
+
+class ParsePool:
+    """
+    Parses files in a process pool. PDFs are read in page ranges: the first
+    range also reports the page count, and the rest of a large document is
+    fanned out across idle workers and reassembled in page order.
+    Pages without a text layer go to a separate OCR pool, so slow tesseract
+    runs never hold up text extraction for other files.
+    Each file has FILE_TIMEOUT seconds from when its first task starts; past
+    that, the workers still running its tasks are killed and replaced.
+    Before a file is yielded, stats[filename] holds (seconds since its first
+    task started, page count or None); the caller pops it.
+    """
+    PAGES_PER_TASK = 25
+    FILE_TIMEOUT = 900
+
+    def __init__(self, reader: FileReader, max_workers: int = 8, pages_per_task: int = None, ocr_workers: int = None, timeout: float = None):
+        self.reader = reader
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task or self.PAGES_PER_TASK
+        self.ocr_workers = ocr_workers or max(1, max_workers // 2)
+        self.timeout = timeout or self.FILE_TIMEOUT
+        self.stats: dict[str, tuple[float, int | None]] = {}
+
+    def parse(self, files: Iterable[Path]) -> Iterator[tuple[str, str | None, Exception | None]]:
+        """Yields (filename, text, error) for each file as soon as all of its pages are done"""
+        incoming = self._prefetch(files)
+        exhausted = False
+        with WorkerPool(self.max_workers) as pool, WorkerPool(self.ocr_workers) as ocr_pool:
+            pending = {}  # future -> (file, task kind, first page)
+            pages: dict[str, list] = {}  # filename -> text per page
+            inflight: dict[str, set] = {}  # filename -> its range and OCR futures not yet done
+            started: dict[str, float] = {}  # filename -> when its first task started
+            began: dict[str, float] = {}  # filename -> when its first finished task started, for stats
+
+            def finish(filename: str):
+                page_list = pages.get(filename)
+                self.stats[filename] = (time.monotonic() - began.pop(filename), len(page_list) if page_list is not None else None)
+
+            def submit(target, file, kind, first_page, *args):
+                future = target.submit(*args)
+                pending[future] = (file, kind, first_page)
+                inflight.setdefault(os.path.normpath(str(file)), set()).add(future)
+
+            def submit_next(block: bool) -> bool:
+                nonlocal exhausted
+                if exhausted:
+                    return False
+                try:
+                    file = incoming.get(block=block)
+                except queue.Empty:
+                    return False
+                if file is _DONE:
+                    exhausted = True
+                    return False
+                if isinstance(file, BaseException):
+                    raise file
+                if file.suffix.lower() == ".pdf":
+                    submit(pool, file, "range", 0, read_pdf_range, file, 0, self.pages_per_task)
+                else:
+                    submit(pool, file, "file", None, self.reader.read_docs, file)
+                return True
+
+            while True:
+                # Files are fed in a small window, so page ranges split off a large PDF
+                # queue ahead of files not yet submitted instead of behind all of them
+                parsing = sum(1 for _, kind, _ in pending.values() if kind != "ocr")
+                # With nothing in flight, block until discovery produces the next file
+                while parsing < self.max_workers * 2 and submit_next(block=not pending):
+                    parsing += 1
+                if not pending:
+                    break
+
+                self._expire(inflight, started, pending, pool, ocr_pool)
+                # Poll more often while files are still arriving, so new ones start promptly
+                done, _ = wait(pending, timeout=1.0 if exhausted else 0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file, kind, first_page = pending.pop(future)
+                    filename = os.path.normpath(str(file))
+                    if filename not in inflight:
+                        continue  # A sibling task already failed the file
+                    inflight[filename].discard(future)
+                    # A file's first task is the first to finish: later ones are only submitted once it has
+                    began.setdefault(filename, future.started_at or time.monotonic())
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        for sibling in inflight.pop(filename):
+                            (ocr_pool if pending[sibling][1] == "ocr" else pool).cancel(sibling)
+                        finish(filename)
+                        pages.pop(filename, None)
+                        started.pop(filename, None)
+                        yield filename, None, e
+                        continue
+
+                    if kind == "file":
+                        del inflight[filename]
+                        started.pop(filename, None)
+                        finish(filename)
+                        if result is None:
+                            yield filename, None, ValueError(f"Unsupported file type: {file.suffix}")
+                        else:
+                            yield filename, result[0], None
+                        continue
+
+                    if kind == "ocr":
+                        pages[filename][first_page] = result
+                    else:
+                        page_texts, page_count = result
+                        if first_page == 0:
+                            pages[filename] = [None] * page_count
+                            for start in range(self.pages_per_task, page_count, self.pages_per_task):
+                                submit(pool, file, "range", start, read_pdf_range, file, start, start + self.pages_per_task)
+                        for i, text in enumerate(page_texts, first_page):
+                            if text is None:
+                                submit(ocr_pool, file, "ocr", i, ocr_pdf_page, file, i)
+                            else:
+                                pages[filename][i] = text
+
+                    if not inflight[filename]:
+                        del inflight[filename]
+                        started.pop(filename, None)
+                        finish(filename)
+                        yield filename, "\n".join(pages.pop(filename)), None
+
+    def _prefetch(self, files: Iterable[Path]) -> queue.Queue:
+        """
+        Drains files on a background thread, so a slow producer (a directory walk
+        over a network share, hashing) never stalls collecting results or
+        enforcing deadlines. Ends with _DONE, or the producer's exception.
+        """
+        incoming = queue.Queue()
+
+        def feed():
+            try:
+                for file in files:
+                    incoming.put(file)
+            except BaseException as e:
+                incoming.put(e)
+            incoming.put(_DONE)
+
+        threading.Thread(target=feed, daemon=True).start()
+        return incoming
+
+    def _expire(self, inflight: dict, started: dict, pending: dict, pool: WorkerPool, ocr_pool: WorkerPool):
+        """Kills every task of a file that has run past its deadline; the failures surface through wait()"""
+        now = time.monotonic()
+        for filename, futures in inflight.items():
+            if filename not in started:
+                starts = [f.started_at for f in futures if f.started_at is not None]
+                if not starts:
+                    continue
+                started[filename] = min(starts)
+            if now - started[filename] > self.timeout:
+                reason = ParseTimeout(f"Exceeded {self.timeout:.0f}s parse deadline")
+                for future in futures:
+                    (ocr_pool if pending[future][1] == "ocr" else pool).cancel(future, reason)
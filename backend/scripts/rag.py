@@ -2,7 +2,9 @@
 import os
 import threading
 import time
+import traceback
 import yaml
+from typing import Mapping
 
 # Third-party imports
 import requests
@@ -11,19 +13,25 @@ from langchain_core.documents import Document
 # Local imports
 from .llm_utils import get_llm_engine
 from .hybrid_retriever import HybridRetriever
+from .index_versions import IndexVersions
 from .retriever_builder import RetrieverBuilder
 from .chunk_documents import DocumentChunker
-from . import config
+from . import config, embedding_backend
 from .config import ModelConfig
 from .handler import TechnicalHandler
 from .utils import Message
 
 class RAGPipeline:
     lock = threading.Lock()
+    # Held for a whole reload, so only one loads at a time
+    reload_lock = threading.Lock()
     engine = None
+    embeddings = None
     hybrid_retriever = None
     retriever = None
     chunk_dict = None
+    index_version = None
+    reload_status = {"state": "idle"}
 
     def __init__(self):
         with self.lock:
@@ -35,13 +43,98 @@ class RAGPipeline:
             config = yaml.safe_load(f)
         self.folder_paths = config["DOCUMENTS"]
 
-    def _get_retrievers(self) -> tuple[HybridRetriever, dict[str, dict[str, list[Document]]]]:
+    def _get_retrievers(self) -> tuple[HybridRetriever, dict[str, Mapping[str, list[Document]]]]:
+        # Both read under the lock, so a request never pairs one version's retriever with another's chunks
         with self.lock:
-            if self.retriever is None or self.chunk_dict is None:
+            if RAGPipeline.retriever is None or RAGPipeline.chunk_dict is None:
                 builder = RetrieverBuilder(self.folder_paths)
-                RAGPipeline.retriever, RAGPipeline.chunk_dict = builder.build_retrievers()
+                RAGPipeline.embeddings = RAGPipeline.embeddings or embedding_backend.load_embeddings()
+                RAGPipeline.retriever, RAGPipeline.chunk_dict = builder.build_retrievers(RAGPipeline.embeddings)
+                RAGPipeline.index_version = builder.version
 
-        return RAGPipeline.retriever, RAGPipeline.chunk_dict
+            return RAGPipeline.retriever, RAGPipeline.chunk_dict
+
+    def reload(self, version: str | None = None) -> str:
+        """
+        Loads an index version (default: the current one) next to the one being
+        served, then swaps it in under the lock. Requests already running keep the
+        retriever they started with and finish on the old version, whose maps are
+        released with its last reference. An explicit version is also made current,
+        so a restart serves it too.
+        """
+        if not RAGPipeline.reload_lock.acquire(blocking=False):
+            raise RuntimeError("An index reload is already running")
+        try:
+            return self._reload(version)
+        finally:
+            RAGPipeline.reload_lock.release()
+
+    def _reload(self, version: str | None) -> str:
+        """reload() with reload_lock already held by the caller"""
+        target = version
+        try:
+            builder = RetrieverBuilder(self.folder_paths)
+            target = version or builder.versions.current()
+            if target is None:
+                raise FileNotFoundError(f"No index version in {builder.versions.root}; run build_index.py")
+            if version is None and target == RAGPipeline.index_version:
+                print(f"[INDEX] Already serving {target}")
+                RAGPipeline.reload_status = {"state": "unchanged", "version": target}
+                return target
+            RAGPipeline.reload_status = {"state": "loading", "version": target, "started": time.time()}
+            t0 = time.time()
+            RAGPipeline.embeddings = RAGPipeline.embeddings or embedding_backend.load_embeddings()
+            retriever, chunk_dict = builder.load_version(target, RAGPipeline.embeddings)
+            if version is not None and version != builder.versions.current():
+                builder.versions.activate(version)
+
+            with self.lock:
+                previous = RAGPipeline.index_version
+                RAGPipeline.retriever, RAGPipeline.chunk_dict = retriever, chunk_dict
+                RAGPipeline.index_version = target
+            # Keyed by version, so nothing stale could be served; this only frees the old version's entries
+            HybridRetriever.results.clear()
+            print(f"[INDEX] Swapped {previous} -> {target} after {time.time() - t0:.2f}s of loading")
+            RAGPipeline.reload_status = {"state": "done", "version": target, "previous": previous, "seconds": round(time.time() - t0, 2)}
+            return target
+        except Exception as e:
+            RAGPipeline.reload_status = {"state": "failed", "version": target, "error": f"{type(e).__name__}: {e}", "at": time.time()}
+            print(f"[INDEX] Reload failed, still serving {RAGPipeline.index_version}: {e}")
+            raise
+
+    def reload_in_background(self, version: str | None = None) -> bool:
+        """
+        Starts a reload on a thread; False if a reload is already running. The
+        lock is taken here, before the thread starts, so two callers can't both
+        start one; the thread releases it. A failure stays in reload_status.
+        """
+        if not RAGPipeline.reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._reload(version)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                RAGPipeline.reload_lock.release()
+
+        try:
+            threading.Thread(target=run, daemon=True).start()
+        except BaseException:
+            RAGPipeline.reload_lock.release()
+            raise
+        return True
+
+    def index_status(self) -> dict:
+        versions = IndexVersions()
+        return {
+            "serving": RAGPipeline.index_version,
+            "current": versions.current(),
+            "versions": versions.available(),
+            "shards": list(RAGPipeline.retriever.shards) if RAGPipeline.retriever else [],
+            "reload": RAGPipeline.reload_status,
+        }
 
     def _search_bing(self, query: str, max_results: int = 5) -> list[str]:
         headers = {"Ocp-Apim-Subscription-Key": config.BING_API_KEY}
@@ -53,7 +146,7 @@ class RAGPipeline:
         return []
     
     @staticmethod
-    def get_surrounding_chunks(doc: Document, chunks_by_source: dict[str, list[Document]], target_chars: int = 1500) -> list[Document]:
+    def get_surrounding_chunks(doc: Document, chunks_by_source: Mapping[str, list[Document]], target_chars: int = 1500) -> list[Document]:
         source = doc.metadata.get("source", "")
         source = os.path.normpath(source)
         if not source or source not in chunks_by_source:
@@ -62,6 +155,9 @@ class RAGPipeline:
         chunk_list = chunks_by_source[source]
         index = doc.metadata.get("chunk_number", 0)
         print(f"INDEX: {index}")
+        # Only expand around the chunk the hit was indexed as; anything else is another build's numbering
+        if index >= len(chunk_list) or chunk_list[index].page_content != doc.page_content:
+            return [doc]
         selected = [doc]
         total_chars = len(chunk_list[index].page_content)
 
@@ -103,12 +199,18 @@ class RAGPipeline:
         
         return chat_docs
 
-    def generate(self, query: str, chat_history: list[Message], use_web_search: bool = False, chat_id: str = None):
-        """Stream the RAG pipeline for interactive question answering."""
+    def generate(self, query: str, chat_history: list[Message], use_web_search: bool = False, chat_id: str = None,
+                 shards: list[str] | None = None):
+        """Stream the RAG pipeline for interactive question answering; shards limits retrieval to those departments."""
         start_time = time.time()
         # 1. Load retrievers
         t0 = time.time()
         hybrid_retriever, chunk_dict = self._get_retrievers()
+        try:
+            hybrid_retriever = hybrid_retriever.subset(shards)
+        except KeyError as e:
+            # The endpoint checked the names, but a reload since then can drop a shard
+            print(f"[WARN] {e.args[0]}; searching all shards of {hybrid_retriever.version}")
         print(f"[1. Retrieval] Loaded retrievers in {time.time() - t0:.2f}s")
         try:
             # Enhanced classification
@@ -183,7 +285,8 @@ class RAGPipeline:
                 if doc.metadata.get("source") == "Uploaded":
                     context_chunks = [doc]
                 else:
-                    context_chunks = self.get_surrounding_chunks(doc, chunk_dict)
+                    # Each shard numbers chunks as it was indexed, which a reused shard can hold from an older build
+                    context_chunks = self.get_surrounding_chunks(doc, chunk_dict.get(doc.metadata.get("shard"), {}))
 
                 retrieved_info.append({
                     "retrieved_chunk": {
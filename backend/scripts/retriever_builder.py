@@ -1,175 +1,443 @@
 # Standard library imports
 import gc
 import os
+import shutil
 import time
 import torch
+from collections import ChainMap
+from pathlib import Path
+from typing import Mapping
 
 # Library specific imports
 import dill
+import numpy as np
 from tqdm import tqdm
 from langchain_community.vectorstores.faiss import FAISS
-from langchain_community.retrievers import BM25Retriever
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 
 # Local imports
-from . import config
+from . import config, embedding_backend
+from .build_report import BuildReport
 from .chunk_documents import DocumentChunker
-from .hybrid_retriever import HybridRetriever
-from .load_utils import CACHE_DIR
+from .chunk_store import ChunkStore
+from .embed_engine import CpuEmbedder
+from .embedding_store import EmbeddingStore
+from .faiss_index import apply_precision, build_index, load_index, save_index, tune_index
+from .hybrid_retriever import HybridRetriever, Shard
+from .index_versions import IndexVersions
+from .load_utils import CACHE_DIR, INDEX_DIR
+from .near_dedup import NearDuplicateCollapser
+from .shards import ALL_SHARD, OTHER_SHARD, shard_names, sources_by_shard
+from .sparse_bm25 import SparseBM25
 
 class RetrieverBuilder:
     CHUNK_SIZE = 1024
     CHUNK_OVERLAP = 100
 
-    def __init__(self, folder_paths: list[str], chunk_size: int = None, chunk_overlap: int = None, tag: str = ""):
+    def __init__(self, folder_paths: list[str], chunk_size: int = None, chunk_overlap: int = None, tag: str = "", update: bool = False,
+                 rebuild_shards: list[str] | None = None):
         self.folder_paths = folder_paths
         self.chunk_size = chunk_size if chunk_size is not None else self.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap if chunk_overlap is not None else self.CHUNK_OVERLAP
         self.tag = tag
-        self.index_dir = os.path.join(os.path.dirname(__file__), "..", "indexes")
+        self.update = update
+        # Shards to rebuild when building; None rebuilds all of them
+        self.rebuild_shards = rebuild_shards
+        self.index_dir = str(INDEX_DIR)
         os.makedirs(self.index_dir, exist_ok=True)
+        self.versions = IndexVersions(tag, INDEX_DIR, keep=config.INDEX_KEEP_VERSIONS)
+        # Version served by the last build_retrievers / load_version
+        self.version = None
 
-        self.bm25_path = os.path.join(self.index_dir, f"bm25{tag}.dill")
-        self.faiss_path = os.path.join(self.index_dir, f"faiss{tag}.dill")
-        self.chunker = DocumentChunker(self.folder_paths)
+        # Sparse BM25 and native FAISS files written straight into indexes/ before versioning
+        self.flat_bm25_path = os.path.join(self.index_dir, f"bm25{tag}")
+        self.flat_faiss_path = os.path.join(self.index_dir, f"faiss{tag}")
+        # Pickled rank_bm25 BM25Retriever written before the sparse index
+        self.legacy_bm25_path = os.path.join(self.index_dir, f"bm25{tag}.dill")
+        # LangChain save_local directory (index.faiss + pickled docstore) written before the native format
+        self.legacy_faiss_path = os.path.join(self.index_dir, f"faiss{tag}.dill")
+        # Filled in by a build and saved with the version it publishes
+        self.report = BuildReport(tag)
+        self.chunker = DocumentChunker(self.folder_paths, report=self.report)
 
     def build_faiss(self, docs, embeddings):
-        # Underlying SentenceTransformer model used for encoding
-        model = embeddings._client
-        if not os.path.exists(self.faiss_path):
-            try:
-                cache_path = CACHE_DIR / f"faiss_embeddings{self.tag}.pkl"
-                
-                if cache_path.exists():
-                    print("[FAISS] Loading cached embeddings...")
-                    embedding_vectors = self._load_embeddings(cache_path, docs)
-                else:
-                    print("[FAISS] Generating embeddings...")
-                    embedding_vectors = self._generate_embeddings(model, cache_path, docs)
-                
-            finally:
-                torch.cuda.empty_cache()
-                gc.collect()
-                print("[FAISS] Embedding model cleaned up")
-
         if not docs:
             print(f"[WARN] No documents to embed. Skipping FAISS build.")
             return
-        
-        print(f"[FAISS] Building index with {len(embedding_vectors)} documents")
-        
-        batch_size = 5000
-        metadatas = [doc.metadata for doc in docs]
-        
-        # Create initial FAISS store with first batch
-        first_batch_size = min(batch_size, len(embedding_vectors))
-        first_batch = embedding_vectors[:batch_size]
-        first_metadatas = metadatas[:batch_size]
-        faiss_store = FAISS.from_embeddings(first_batch, embedding=embeddings, metadatas=first_metadatas)
-        
-        for i in range(batch_size, len(embedding_vectors), batch_size):
-            batch = embedding_vectors[i:i + batch_size]
-            batch_metadatas = metadatas[i:i + batch_size]
-
-            faiss_store.add_embeddings(
-                text_embeddings=batch,
-                metadatas=batch_metadatas
-            )
-
-            del batch, batch_metadatas
+        self._write_faiss(docs, self._embed(docs, embeddings))
+
+    def _embed(self, docs: list[Document], embeddings) -> EmbeddingStore:
+        """Makes sure every chunk has a vector in the store, encoding only those no build has embedded"""
+        with self.report.stage("embed") as stage:
+            store = EmbeddingStore(embedding_backend.model_id(), dtype=config.EMBED_DTYPE)
+            if store.load():
+                print(f"[FAISS] Mapped {len(store)} cached embeddings for {store.model}")
+            texts = list(dict.fromkeys(doc.page_content for doc in docs))
+            missing = store.missing(texts)
+            encode = lambda sample: np.array(embeddings.embed_documents(sample), dtype=np.float32)
+
+            # Embeddings from the per-tag dill cache used before the shared store are carried over once
+            legacy_path = CACHE_DIR / f"faiss_embeddings{self.tag}.pkl"
+            known = {}
+            if missing and legacy_path.exists():
+                print(f"[FAISS] Migrating {legacy_path.name}...")
+                known = self._load_embeddings(legacy_path, docs, encode)
+                carried = [text for text in missing if text in known]
+                store.add(carried, np.array([known[text] for text in carried], dtype=np.float32))
+                os.replace(legacy_path, legacy_path.with_name(legacy_path.name + ".migrated"))
+                del known
+                missing = store.missing(missing)
+
+            # What an earlier (possibly interrupted) build stored is only reused if the model still agrees with it
+            pending = set(missing)
+            cached = [text for text in texts if text not in pending]
+            if cached:
+                agreement = store.verify(cached, encode)
+                if agreement < store.MIN_COSINE:
+                    print(f"[WARN] Cached embeddings disagree with {store.model} (lowest cosine {agreement:.3f}); re-encoding all {len(texts)} chunks")
+                    missing = texts
+
+            # Only chunks no build has ever embedded reach the model
+            print(f"[FAISS] Reusing {len(texts) - len(missing)} cached embeddings, encoding {len(missing)} chunks")
+            stage.update(vectors=len(missing), cached=len(texts) - len(missing))
+            if missing:
+                # Underlying SentenceTransformer model used for encoding
+                model = embeddings._client
+                try:
+                    model_name, model_kwargs = embedding_backend.sentence_transformer_args()
+                    if model_kwargs["device"] == "cpu":
+                        embedder = CpuEmbedder(model_name, config.EMBED_WORKERS, config.EMBED_THREADS, model_kwargs)
+                        embedder.encode(missing, store.add, model=model)
+                    else:
+                        self._generate_embeddings(model, missing, store)
+                    store.compact()
+                finally:
+                    del model
+                    torch.cuda.empty_cache()
+                    gc.collect()
+                    print("[FAISS] Embedding model cleaned up")
+        return store
+
+    def _write_faiss(self, docs: list[Document], store: EmbeddingStore):
+        print(f"[FAISS] Building index with {len(docs)} documents")
+        with self.report.stage("faiss") as stage:
+            vectors = store.vectors(store.locate([doc.page_content for doc in docs]))
+            index = build_index(vectors, apply_precision(config.FAISS_INDEX, config.FAISS_PRECISION, config.FAISS_PCA_DIM))
+            del vectors
+            # Chunks first: the index file is what marks a complete build
+            ChunkStore.write(self.chunk_store_path, docs)
+            save_index(index, self.faiss_path)
+            stage["vectors"] = index.ntotal
+            del index
             gc.collect()
 
-        del embedding_vectors, metadatas, model
-        torch.cuda.empty_cache()
-        gc.collect()
-        
-        faiss_store.save_local(self.faiss_path)
-
-        return faiss_store
-    
-
-    def build_retrievers(self) -> tuple[dict[str, BM25Retriever], dict[str, FAISS], dict[str, dict[str, list[Document]]]]:
-        """Load or build BM25 and FAISS retrievers, caching FAISS in memory. Returns chunk dict as dict[source] = [docs]."""
-        embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-large-en-v1.5",
-            model_kwargs={'device': config.EMBED_DEVICE}
-        )
-
-        # Build missing retrievers
-        chunks_by_source = self.chunker.get_chunks(self.chunk_size, self.chunk_overlap, tag=self.tag)
-        docs = [doc for doc_list in chunks_by_source.values() for doc in doc_list]
-
-        if not os.path.exists(self.bm25_path):
-            bm25 = BM25Retriever.from_documents(docs)
-            with open(self.bm25_path, "wb") as f:
-                dill.dump(bm25, f)
+    def _use_directory(self, directory: str | Path):
+        """Points the index paths at a shard directory (or the root of a version built before sharding)"""
+        os.makedirs(directory, exist_ok=True)
+        self.bm25_path = os.path.join(directory, "bm25")
+        self.faiss_path = os.path.join(directory, "faiss.index")
+        self.chunk_store_path = os.path.join(directory, "faiss")
+
+    @staticmethod
+    def _chunks_path(directory: str | Path) -> Path:
+        """
+        The chunk dict of a version, shared by its shards. In a shard's directory,
+        the chunks that shard was indexed from where they differ from the version's
+        (a reused shard holding a document a rebuilt shard re-chunked).
+        """
+        return Path(directory) / "chunked_docs.json"
+
+    def _shard_chunks(self, directory: Path) -> dict[str, list[Document]]:
+        path = self._chunks_path(directory)
+        return self.chunker._load_chunk_cache(path) if path.exists() else {}
+
+    @staticmethod
+    def _link_shard(source: Path, target: Path):
+        """Hard-links a shard's files into another version (files are only ever replaced, never edited), copying across filesystems"""
+        target.mkdir(parents=True, exist_ok=True)
+        for path in source.iterdir():
+            try:
+                os.link(path, target / path.name)
+            except OSError:
+                shutil.copy2(path, target / path.name)
+
+    def _load_faiss(self, embeddings) -> FAISS:
+        """Maps the native index and chunk store; near-instant, and no chunk is read until a search returns it"""
+        t0 = time.time()
+        index = tune_index(load_index(self.faiss_path), config.FAISS_NPROBE, config.FAISS_EF_SEARCH)
+        chunks = ChunkStore(self.chunk_store_path)
+        if index.ntotal != len(chunks):
+            raise ValueError(f"{self.faiss_path} has {index.ntotal} vectors but {len(chunks)} chunks; rebuild the index")
+        print(f"[FAISS] Mapped {index.ntotal} vectors in {time.time() - t0:.2f}s")
+        return FAISS(embeddings, index, chunks, chunks.row_ids())
+
+    def _migrate_legacy_bm25(self):
+        """Re-indexes the chunks of a pickled BM25Retriever into the sparse format once"""
+        print(f"[BM25] Converting {os.path.basename(self.legacy_bm25_path)} to the sparse format...")
+        with open(self.legacy_bm25_path, "rb") as f:
+            legacy = dill.load(f)
+        SparseBM25.from_documents(legacy.docs, k=legacy.k).save(self.bm25_path)
+
+    def _migrate_legacy_faiss(self, embeddings):
+        """Converts a save_local index to the native format once, without re-embedding"""
+        print(f"[FAISS] Converting {os.path.basename(self.legacy_faiss_path)} to the native format...")
+        legacy = FAISS.load_local(self.legacy_faiss_path, embeddings, allow_dangerous_deserialization=True)
+        docs = [legacy.docstore.search(legacy.index_to_docstore_id[i]) for i in range(legacy.index.ntotal)]
+        ChunkStore.write(self.chunk_store_path, docs)
+        save_index(legacy.index, self.faiss_path)
+
+    def _manifest(self, chunks_by_source: dict[str, list[Document]], started: float, **extra) -> dict:
+        return {
+            "tag": self.tag,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "build_seconds": round(time.time() - started, 1),
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "sources": len(chunks_by_source),
+            "chunks": sum(len(chunk_list) for chunk_list in chunks_by_source.values()),
+            "embed_model": embedding_backend.model_id(),
+            "faiss_index": apply_precision(config.FAISS_INDEX, config.FAISS_PRECISION, config.FAISS_PCA_DIM),
+            "near_dup_threshold": config.NEAR_DUP_THRESHOLD,
+            **extra,
+        }
+
+    def _build_version(self, embeddings) -> str:
+        """
+        Chunks, indexes and publishes a new version with one shard per DOCUMENTS
+        folder; unchanged chunks reuse their cached embeddings. With
+        rebuild_shards, only those shards are rebuilt: the rest are linked from
+        the current version and keep its chunks, so other departments' indexes
+        are neither re-embedded nor changed.
+        """
+        started = time.time()
+        chunks_by_source = self.chunker.get_chunks(self.chunk_size, self.chunk_overlap, tag=self.tag, update=self.update)
+        folders = shard_names(self.folder_paths)
+        by_shard = sources_by_shard(chunks_by_source, folders)
+
+        previous = self.versions.current()
+        previous_shards = self.versions.manifest(previous).get("shards", {}) if previous else {}
+        reused, own_chunks = {}, {}
+        if self.rebuild_shards:
+            unknown = set(self.rebuild_shards) - set(folders) - set(previous_shards) - {OTHER_SHARD}
+            if unknown:
+                raise ValueError(f"Unknown shards {sorted(unknown)}; configured: {sorted(folders)}")
+            if previous_shards:
+                reused = {name: info for name, info in previous_shards.items() if name not in self.rebuild_shards}
+                previous_chunks = self.chunker._load_chunk_cache(self._chunks_path(self.versions.path(previous)))
+                previous_by_shard = sources_by_shard(previous_chunks, folders)
+                rebuilt = {name: by_shard.get(name, []) for name in self.rebuild_shards}
+                # Reused shards keep the chunks they were indexed from; a document also in a rebuilt shard takes its new chunks
+                merged = {source: previous_chunks[source] for name in reused for source in previous_by_shard.get(name, [])}
+                merged.update({source: chunks_by_source[source] for sources in rebuilt.values() for source in sources})
+                # ...but a reused shard's index still numbers the old ones, so it keeps those for surrounding context
+                for name in reused:
+                    own = {source: previous_chunks[source] for source in previous_by_shard.get(name, [])}
+                    own.update(self._shard_chunks(self.versions.path(previous) / name))
+                    own_chunks[name] = {
+                        source: chunk_list for source, chunk_list in own.items()
+                        if [doc.page_content for doc in chunk_list] != [doc.page_content for doc in merged.get(source, [])]
+                    }
+                chunks_by_source, by_shard = merged, rebuilt
+            else:
+                print(f"[INDEX] {previous or 'No version'} has no shards to reuse; building every shard")
+
+        version, directory = self.versions.stage()
+        print(f"[INDEX] Building version {version}: shards {', '.join(sorted(by_shard))}"
+              + (f", reusing {', '.join(sorted(reused))} from {previous}" if reused else ""))
+        self.chunker._save_chunk_cache(self._chunks_path(directory), chunks_by_source)
+
+        # Only the indexes are collapsed; chunks_by_source keeps every chunk for surrounding context
+        shard_docs = {
+            name: self._collapse_near_duplicates([doc for source in by_shard[name] for doc in chunks_by_source[source]])
+            for name in sorted(by_shard)
+        }
+        shard_docs = {name: docs for name, docs in shard_docs.items() if docs}
+        # Embedded in one pass, so the model is loaded and cached vectors verified once for all shards
+        store = self._embed([doc for docs in shard_docs.values() for doc in docs], embeddings) if shard_docs else None
+        shards = {}
+        for name, docs in shard_docs.items():
+            self._use_directory(directory / name)
+            t0 = time.time()
+            with self.report.stage("bm25") as stage:
+                SparseBM25.from_documents(docs).save(self.bm25_path)
+                stage["chunks"] = len(docs)
+            print(f"[BM25] Indexed {len(docs)} chunks of {name} in {time.time() - t0:.1f}s")
+            self._write_faiss(docs, store)
+            shards[name] = {"folder": folders.get(name, ""), "sources": len(by_shard[name]), "indexed_chunks": len(docs), "built_in": version}
+        for name, info in reused.items():
+            self._link_shard(self.versions.path(previous) / name, directory / name)
+            # Replaced, not edited, so the previous version's linked copy is untouched
+            self._chunks_path(directory / name).unlink(missing_ok=True)
+            if own_chunks.get(name):
+                self.chunker._save_chunk_cache(self._chunks_path(directory / name), own_chunks[name])
+                print(f"[INDEX] {name} keeps its own chunks of {len(own_chunks[name])} documents re-chunked in other shards")
+            shards[name] = info
+        if not shards:
+            raise ValueError("No chunks to index")
+        manifest = self._manifest(chunks_by_source, started, shards=dict(sorted(shards.items())))
+        self.report.save(version, manifest, self.versions.publish(version, manifest))
+        return version
+
+    def _adopt_flat_index(self, embeddings) -> str | None:
+        """
+        Moves an index written before versioning (indexes/bm25{tag}*, faiss{tag}*,
+        or their pickled forms) into the first version, converting pickles on the
+        way, so existing deployments are served without a rebuild.
+        """
+        flat_bm25 = SparseBM25.exists(self.flat_bm25_path)
+        flat_faiss = os.path.exists(self.flat_faiss_path + ".index") and ChunkStore.exists(self.flat_faiss_path)
+        chunk_cache = CACHE_DIR / f"chunked_docs{self.tag}.json"
+        if not (flat_bm25 or os.path.exists(self.legacy_bm25_path)) or not (flat_faiss or os.path.isdir(self.legacy_faiss_path)) or not chunk_cache.exists():
+            return None
+
+        started = time.time()
+        version, directory = self.versions.stage()
+        print(f"[INDEX] Moving the unversioned {self.tag or 'prod'} index into version {version}")
+        self._use_directory(directory)
+        chunks_by_source = self.chunker._load_chunk_cache(chunk_cache)
+        self.chunker._save_chunk_cache(self._chunks_path(directory), chunks_by_source)
+        if flat_bm25:
+            for suffix in (".vocab.json", ".chunks", ".offsets.npy", ".npz"):
+                os.replace(self.flat_bm25_path + suffix, self.bm25_path + suffix)
         else:
-            with open(self.bm25_path, "rb") as f:
-                bm25 = dill.load(f)
-        if not os.path.exists(self.faiss_path):
-            faiss = self.build_faiss(docs, embeddings)
+            self._migrate_legacy_bm25()
+        if flat_faiss:
+            for suffix in (".chunks", ".offsets.npy", ".index"):
+                os.replace(self.flat_faiss_path + suffix, self.chunk_store_path + suffix)
         else:
+            self._migrate_legacy_faiss(embeddings)
+        self.versions.publish(version, self._manifest(chunks_by_source, started, adopted=True))
+        return version
+
+    def load_version(self, version: str, embeddings=None) -> tuple[HybridRetriever, dict[str, Mapping[str, list[Document]]]]:
+        """
+        Maps every shard of a published version and loads the chunks each was
+        indexed from, as dict[shard] = {source: [docs]}; never builds. Shards
+        share the version's chunk dict except where they keep their own.
+        """
+        manifest = self.versions.manifest(version)
+        if manifest.get("embed_model") != embedding_backend.model_id():
+            print(f"[WARN] Version {version} was embedded with {manifest.get('embed_model')}, "
+                  f"but queries will be embedded with {embedding_backend.model_id()}")
+        embeddings = embeddings or embedding_backend.load_embeddings()
+        root = self.versions.path(version)
+
+        shards = []
+        # A version built before sharding holds one index over every folder at its root
+        for name in manifest.get("shards") or [ALL_SHARD]:
+            self._use_directory(root / name if manifest.get("shards") else root)
             t0 = time.time()
-            faiss = FAISS.load_local(self.faiss_path, embeddings, allow_dangerous_deserialization=True)
-            print(f"[FAISS] Loaded in {time.time() - t0:.2f}s")
+            bm25 = SparseBM25.load(self.bm25_path)
+            print(f"[BM25] Loaded {name}: {bm25.weights.shape[0]} terms x {bm25.weights.shape[1]} chunks in {time.time() - t0:.2f}s")
+            shards.append(Shard(name, bm25, self._load_faiss(embeddings)))
+        chunks_by_source = self.chunker._load_chunk_cache(self._chunks_path(root))
+        chunks_by_shard = {}
+        for shard in shards:
+            own = self._shard_chunks(root / shard.name) if manifest.get("shards") else {}
+            chunks_by_shard[shard.name] = ChainMap(own, chunks_by_source) if own else chunks_by_source
+
+        self.version = version
+        print(f"[INDEX] Loaded version {self.versions.root.name}/{version} ({len(shards)} shards: {', '.join(shard.name for shard in shards)})")
+        return HybridRetriever(shards, f"{self.versions.root.name}/{version}"), chunks_by_shard
 
-        faiss_retriever = faiss.as_retriever(search_type="mmr", search_kwargs={'k': 6})
-        hybrid_retriever = HybridRetriever(bm25, faiss_retriever)
+    def build_retrievers(self, embeddings=None) -> tuple[HybridRetriever, dict[str, Mapping[str, list[Document]]]]:
+        """
+        Loads the current index version, building one first if there is none (or
+        always, with update). Returns the hybrid retriever and the chunks each
+        shard was indexed from as dict[shard] = {source: [docs]}; self.version
+        names the version loaded.
+        """
+        embeddings = embeddings or embedding_backend.load_embeddings()
+        building = self.update or self.rebuild_shards
+        version = None if building else self.versions.current() or self._adopt_flat_index(embeddings)
+        if version is None:
+            version = self._build_version(embeddings)
+        return self.load_version(version, embeddings)
 
-        return hybrid_retriever, chunks_by_source
+    def _collapse_near_duplicates(self, docs: list[Document]) -> list[Document]:
+        if not config.NEAR_DUP_THRESHOLD or not docs:
+            return docs
+        t0 = time.time()
+        with self.report.stage("dedup") as stage:
+            collapsed = NearDuplicateCollapser(config.NEAR_DUP_THRESHOLD).collapse(docs)
+            stage["chunks"] = len(docs)
+        removed = len(docs) - len(collapsed)
+        print(f"[DEDUP] Collapsed {removed} near-duplicate chunks: index {len(docs)} -> {len(collapsed)} chunks "
+              f"({removed / len(docs):.1%} smaller) in {time.time() - t0:.1f}s")
+        return collapsed
 
-    def _load_embeddings(self, cache_path: str, docs: list[Document]) -> list[tuple[str, list[float]]]:
-        texts = [doc.page_content for doc in docs]
-        vectors = []
+    def _load_embeddings(self, cache_path: str, docs: list[Document], encode) -> dict[str, list[float]]:
+        """
+        Reads the legacy dill embedding cache into a text -> vector map. Caches
+        written before vectors were stored with their text are matched to docs
+        by position, and only trusted if the counts agree and a sample of docs
+        re-encoded with encode matches the vectors at their positions.
+        """
+        known = {}
+        legacy = []
 
         with open(cache_path, "rb") as f:
+            batches = 0
             while True:
                 try:
                     batch = dill.load(f)
-                    vectors.extend(batch)
                 except EOFError:
                     break
+                except Exception as e:
+                    # A build killed mid-dump leaves a truncated last batch; the complete ones before it are kept
+                    print(f"[WARN] {os.path.basename(cache_path)} is truncated after {batches} batches, keeping those: {e}")
+                    break
+                batches += 1
+                for item in batch:
+                    if isinstance(item, tuple):
+                        text, vector = item
+                        known[text] = vector
+                    else:
+                        legacy.append(item)
 
-        return list(zip(texts, vectors))
+        if legacy:
+            texts = [doc.page_content for doc in docs]
+            if len(legacy) != len(docs):
+                print(f"[WARN] Legacy embedding cache has {len(legacy)} vectors for {len(docs)} chunks, ignoring it")
+                return known
+            sample = np.unique(np.linspace(0, len(texts) - 1, EmbeddingStore.VERIFY_SAMPLE).astype(int))
+            agreement = EmbeddingStore.agreement([legacy[i] for i in sample], encode([texts[i] for i in sample]))
+            if agreement < EmbeddingStore.MIN_COSINE:
+                print(f"[WARN] Legacy embedding cache is not aligned with the chunks (lowest cosine {agreement:.3f}), ignoring it")
+                return known
+            known.update(zip(texts, legacy))
+        return known
 
-    def _generate_embeddings(self, model, cache_path: str, docs: list[Document]) -> list[tuple[str, list[float]]]:
-        texts = [doc.page_content for doc in docs]
+    def _generate_embeddings(self, model, texts: list[str], store: EmbeddingStore):
+        """
+        GPU path: encodes texts in slices of 5000, halving the batch size on CUDA OOM, and
+        appends each slice to the store as it finishes, so an interrupted build
+        keeps what it has already encoded.
+        """
         batch_size = 32
         chunk_size = 5000
-        embeddings = []
-        
+
         with tqdm(total=len(texts), desc="Generating embeddings") as pbar:
-            # Process and cache in chunks
-            with open(cache_path, "wb") as cache_file:
-                for i in range(0, len(texts), chunk_size):
-                    chunk_texts = texts[i:i + chunk_size]
-                    chunk_embeddings = []
-                    
-                    try:
-                        batch_vectors = model.encode(
-                            chunk_texts,
-                            batch_size=batch_size,
-                            show_progress_bar=False,
-                            convert_to_numpy=True,
-                            normalize_embeddings=True
-                        )
-                        # Convert to list immediately to save memory
-                        batch_vectors = [v.tolist() for v in batch_vectors]
-                        chunk_embeddings.extend(batch_vectors)
-                        
-                        pbar.update(len(chunk_texts))
-                        
-                    except RuntimeError as e:
-                        if "CUDA out of memory" in str(e):
-                            print(f"[WARN] CUDA OOM, reducing batch size")
-                            batch_size = max(1, batch_size // 2)
-                            continue
-                        raise
-                    
-                    dill.dump(chunk_embeddings, cache_file)
-                    embeddings.extend(list(zip(chunk_texts, chunk_embeddings)))
-                    del chunk_embeddings
-                    gc.collect()
-        
-        return embeddings
\ No newline at end of file
+            i = 0
+            while i < len(texts):
+                chunk_texts = texts[i:i + chunk_size]
+                try:
+                    batch_vectors = model.encode(
+                        chunk_texts,
+                        batch_size=batch_size,
+                        show_progress_bar=False,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True
+                    )
+                except RuntimeError as e:
+                    if "CUDA out of memory" in str(e):
+                        print(f"[WARN] CUDA OOM, reducing batch size")
+                        batch_size = max(1, batch_size // 2)
+                        continue
+                    raise
+
+                store.add(chunk_texts, batch_vectors)
+                pbar.update(len(chunk_texts))
+                i += chunk_size
+                del batch_vectors
+                gc.collect()
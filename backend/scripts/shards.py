@@ -0,0 +1,48 @@
+# Standard library imports
+import os
+import re
+
+# Shard for chunks whose source lies under none of the DOCUMENTS folders
+OTHER_SHARD = "other"
+# Shard name of a version built before sharding: one index over every folder
+ALL_SHARD = "all"
+
+def shard_names(folder_paths: list[str]) -> dict[str, str]:
+    """
+    One shard per DOCUMENTS folder, named after the folder (lowercased, unsafe
+    characters replaced), as name -> folder. Folders with the same name get a
+    numeric suffix in DOCUMENTS order, so the names are stable between builds.
+    """
+    shards = {}
+    for folder in folder_paths:
+        folder = os.path.normpath(folder)
+        base = re.sub(r"[^\w.-]+", "_", os.path.basename(folder)).strip("._").lower() or "root"
+        name, n = base, 1
+        while name in shards or name in (OTHER_SHARD, ALL_SHARD):
+            n += 1
+            name = f"{base}_{n}"
+        shards[name] = folder
+    return shards
+
+def shard_of(path: str, shards: dict[str, str]) -> str:
+    """The shard whose folder holds path, the deepest one when folders nest"""
+    path = os.path.normcase(os.path.normpath(path))
+    best, depth = OTHER_SHARD, -1
+    for name, folder in shards.items():
+        folder = os.path.normcase(folder).rstrip(os.sep)
+        if (path == folder or path.startswith(folder + os.sep)) and len(folder) > depth:
+            best, depth = name, len(folder)
+    return best
+
+def sources_by_shard(chunks_by_source: dict, shards: dict[str, str]) -> dict[str, list[str]]:
+    """
+    The sources each shard indexes. A document with identical copies in other
+    folders (its aliases) is indexed in each of their shards, so filtering to
+    any one department still finds it.
+    """
+    by_shard: dict[str, list[str]] = {}
+    for source, chunk_list in chunks_by_source.items():
+        aliases = chunk_list[0].metadata.get("aliases", []) if chunk_list else []
+        for name in dict.fromkeys(shard_of(path, shards) for path in [source, *aliases]):
+            by_shard.setdefault(name, []).append(source)
+    return by_shard
@@ -0,0 +1,114 @@
+# Standard library imports
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+# Library specific imports
+import numpy as np
+import scipy.sparse as sp
+from langchain_core.documents import Document
+
+# Local imports
+from .chunk_store import ChunkStore
+
+class SparseBM25:
+    """
+    BM25 over an inverted index held as a scipy sparse matrix. Every term's
+    BM25 weight in every chunk it occurs in is computed once at build time, one
+    row per term, so a query only sums the rows of its own terms and touches
+    only the chunks that contain them. Scores match rank_bm25's BM25Okapi (and
+    so the BM25Retriever it replaces) exactly, including its whitespace
+    tokenization and its idf floor for terms in over half the chunks.
+
+    Saved as <path>.npz (the term x chunk weights), <path>.vocab.json (terms in
+    row order and the parameters) and a ChunkStore at <path> for the chunks.
+    """
+    K1 = 1.5
+    B = 0.75
+    EPSILON = 0.25
+
+    def __init__(self, weights: sp.csr_matrix, vocab: dict[str, int], docs: ChunkStore | list[Document], k: int = 4):
+        self.weights = weights
+        self.vocab = vocab
+        self.docs = docs
+        self.k = k
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        return text.split()
+
+    @classmethod
+    def from_documents(cls, docs: list[Document], k: int = 4) -> "SparseBM25":
+        vocab: dict[str, int] = {}
+        rows, cols, freqs, lengths = [], [], [], np.empty(len(docs), dtype=np.float64)
+        for col, doc in enumerate(docs):
+            tokens = cls.tokenize(doc.page_content)
+            lengths[col] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                rows.append(vocab.setdefault(term, len(vocab)))
+                cols.append(col)
+                freqs.append(freq)
+        rows, cols, freqs = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(freqs, dtype=np.float64)
+
+        # rank_bm25's idf: log((N - n + 0.5) / (n + 0.5)), negatives raised to EPSILON * mean idf
+        n_docs = np.bincount(rows, minlength=len(vocab))
+        idf = np.log(len(docs) - n_docs + 0.5) - np.log(n_docs + 0.5)
+        if len(idf):
+            idf[idf < 0] = cls.EPSILON * idf.mean()
+        norm = cls.K1 * (1 - cls.B + cls.B * lengths / max(lengths.mean(), 1e-9)) if len(docs) else lengths
+        data = idf[rows] * freqs * (cls.K1 + 1) / (freqs + norm[cols])
+        weights = sp.csr_matrix((data.astype(np.float32), (rows, cols)), shape=(len(vocab), len(docs)))
+        return cls(weights, vocab, list(docs), k=k)
+
+    def scores(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """(chunk positions, scores) of the chunks containing at least one query term"""
+        # A repeated query term counts once per occurrence, as in rank_bm25
+        counts = Counter(term for term in self.tokenize(query) if term in self.vocab)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        terms = np.fromiter((self.vocab[term] for term in counts), dtype=np.int64, count=len(counts))
+        multiplicity = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        summed = sp.csr_matrix(multiplicity[None, :]) @ self.weights[terms]
+        return summed.indices, summed.data
+
+    def invoke(self, query: str) -> list[Document]:
+        """The k highest-scoring chunks, best first; chunks sharing no term with the query are never returned"""
+        positions, scores = self.scores(query)
+        if len(positions) > self.k:
+            top = np.argpartition(-scores, self.k - 1)[:self.k]
+            positions, scores = positions[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [self._doc(int(position)) for position in positions[order]]
+
+    def _doc(self, position: int) -> Document:
+        return self.docs.search(position) if isinstance(self.docs, ChunkStore) else self.docs[position]
+
+    def save(self, path: str | Path):
+        path = Path(path)
+        ChunkStore.write(path, [self._doc(i) for i in range(self.weights.shape[1])])
+        # Suffixes are appended, not with_suffix: index tags may contain dots
+        tmp_path = path.with_name(path.name + ".tmp.npz")
+        sp.save_npz(tmp_path, self.weights, compressed=False)
+        vocab_path = path.with_name(path.name + ".vocab.json")
+        with open(vocab_path.with_name(vocab_path.name + ".tmp"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.K1, "b": self.B, "epsilon": self.EPSILON, "k": self.k, "terms": list(self.vocab)}, f, ensure_ascii=False)
+        os.replace(vocab_path.with_name(vocab_path.name + ".tmp"), vocab_path)
+        # The matrix is written last and marks a complete index
+        os.replace(tmp_path, path.with_name(path.name + ".npz"))
+
+    @classmethod
+    def exists(cls, path: str | Path) -> bool:
+        path = Path(path)
+        return path.with_name(path.name + ".npz").exists() and path.with_name(path.name + ".vocab.json").exists() and ChunkStore.exists(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SparseBM25":
+        path = Path(path)
+        with open(path.with_name(path.name + ".vocab.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        weights = sp.load_npz(path.with_name(path.name + ".npz")).tocsr()
+        docs = ChunkStore(path)
+        if weights.shape != (len(meta["terms"]), len(docs)):
+            raise ValueError(f"{path.name}: {weights.shape} weights for {len(meta['terms'])} terms and {len(docs)} chunks; rebuild the index")
+        return cls(weights, {term: row for row, term in enumerate(meta["terms"])}, docs, k=meta["k"])
@@ -13,12 +13,17 @@ class QueryInput(BaseModel):
     history: list[Message] = []
     use_web_search: bool
     chat_id: str | None = None
+    # Department shards to search, e.g. ["engineering"]; all of them when omitted
+    shards: list[str] | None = None
 
 class Configuration(BaseModel):
     temperature: float
     model: str
     tone: str
 
+class IndexReload(BaseModel):
+    version: str | None = None
+
 class UploadedDocument(BaseModel):
     filename: str
     content: str
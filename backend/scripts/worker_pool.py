@@ -0,0 +1,162 @@
+# Standard library imports
+import collections
+import multiprocessing
+import pickle
+import threading
+import time
+from concurrent.futures import Future, CancelledError, InvalidStateError
+from multiprocessing.connection import wait as wait_connections
+
+def _worker_main(conn):
+    """Runs tasks sent over conn until it is closed. Results that can't be pickled come back as RuntimeError."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            result = ("ok", fn(*args))
+        except BaseException as e:
+            result = ("err", e)
+        try:
+            # Round-trip first: some exceptions pickle but can't be unpickled, which would surface in the parent
+            conn.send(pickle.loads(pickle.dumps(result)))
+        except Exception:
+            conn.send(("err", RuntimeError(f"{type(result[1]).__name__}: {result[1]}")))
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.future: Future | None = None
+
+    def close(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class WorkerPool:
+    """
+    Process pool whose running tasks can be cancelled. ProcessPoolExecutor can
+    only cancel tasks that haven't started, so one stuck parse pins a worker
+    for good; here cancel() kills the worker running the task and starts a
+    fresh one in its place. Futures get a started_at timestamp (time.monotonic)
+    once a worker picks them up.
+    """
+    def __init__(self, max_workers: int):
+        # Never fork: replacement workers are started from the dispatcher thread while the parent runs
+        # discovery and prefetch threads, and a forked child can inherit a lock one of them held.
+        # forkserver forks from a clean single-threaded server; spawn where it's unavailable (Windows).
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = [_Worker(self._context) for _ in range(max_workers)]
+        self._queue = collections.deque()
+        self._retired: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._wakeup_recv, self._wakeup_send = self._context.Pipe(duplex=False)
+        self._shutdown = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        future.started_at = None
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.append((future, fn, args))
+        self._wakeup_send.send(None)
+        return future
+
+    def cancel(self, future: Future, reason: Exception | None = None):
+        """Cancels a queued task, or kills the worker running it. The future fails with reason."""
+        with self._lock:
+            for worker in self._workers:
+                if worker.future is future:
+                    # The dispatcher may be waiting on this pipe, so it is closed there, not here
+                    worker.process.kill()
+                    self._retire(worker)
+                    break
+            else:
+                self._queue = collections.deque(task for task in self._queue if task[0] is not future)
+        try:
+            future.set_exception(reason or CancelledError())
+        except InvalidStateError:
+            pass  # Finished before it could be cancelled
+        self._wakeup_send.send(None)
+
+    def shutdown(self):
+        with self._lock:
+            self._shutdown = True
+            for future, _, _ in self._queue:
+                future.cancel()
+            self._queue.clear()
+        self._wakeup_send.send(None)
+        self._thread.join()
+        for worker in self._workers + self._retired:
+            worker.close()
+
+    def _retire(self, worker: _Worker):
+        """Swaps a dead or killed worker for a fresh one. Must hold the lock."""
+        self._workers[self._workers.index(worker)] = _Worker(self._context)
+        self._retired.append(worker)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._shutdown:
+                    return
+                for worker in self._retired:
+                    worker.close()
+                self._retired.clear()
+                for worker in self._workers:
+                    while worker.future is None and self._queue:
+                        future, fn, args = self._queue.popleft()
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        try:
+                            worker.conn.send((fn, args))
+                        except Exception as e:
+                            future.set_exception(e)
+                            continue
+                        future.started_at = time.monotonic()
+                        worker.future = future
+                busy = {worker.conn: worker for worker in self._workers if worker.future is not None}
+
+            for conn in wait_connections([self._wakeup_recv, *busy]):
+                if conn is self._wakeup_recv:
+                    while self._wakeup_recv.poll():
+                        self._wakeup_recv.recv()
+                    continue
+                self._collect(busy[conn])
+
+    def _collect(self, worker: _Worker):
+        with self._lock:
+            # The worker may have been killed by cancel() while we were waiting on it
+            if worker not in self._workers or worker.future is None:
+                return
+            future, worker.future = worker.future, None
+            try:
+                status, value = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.process.join()
+                status, value = "err", RuntimeError(f"Worker process exited with code {worker.process.exitcode}")
+                self._retire(worker)
+        try:
+            if status == "ok":
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        except InvalidStateError:
+            pass  # Already failed by cancel()